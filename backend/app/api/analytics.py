@@ -1,17 +1,873 @@
-from fastapi import APIRouter, Depends
+from collections import defaultdict
+from datetime import date
+from types import SimpleNamespace
+from operator import attrgetter
+from typing import NamedTuple, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func, select
-from app.db.database import get_db
+from sqlalchemy import Float, Integer, String, case, cast, func, null, select, union_all
+from app.db.database import get_async_db
 from app.models.employee import Employee
 from app.models.project import Project
 from app.models.timesheet import Timesheet
-from app.schemas.analytics_schema import EmployeeROI, ProjectProfit, DepartmentSummary
+from app.models.rollup import DepartmentRollup, EmployeeProjectRollup, EmployeeRollup, ProjectRollup
+from app.schemas.analytics_schema import (
+    AnalyticsSnapshot, DepartmentSummary, EmployeeProjectShare, EmployeeROI, EmployeeROIDetail, ProjectProfit,
+    ProjectProfitDetail,
+)
+from app.schemas.scenario_schema import ScenarioRequest, ScenarioResponse
+from app.utils.cache import analytics_cache, cached_response, get_data_version, get_data_version_async
+from app.utils.columnar import NUMPY_AVAILABLE, columnar_snapshot, columnar_store, load_stale_tables, resolve_engine
+from app.utils.serialization import RESPONSE_FORMATS, columnar, dumps, field_names
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
 
+# Routes answer from the versioned response cache (ETag / If-None-Match aware).
+# All-time results on the SQL engine read each part from its own rollup table;
+# periods, the numpy engine, /snapshot and the reports share one snapshot per
+# data version (and period).
+# ?engine=sql|numpy picks how the snapshot is computed (default: ANALYTICS_ENGINE);
+# ?start=&end= (inclusive work dates) restrict it to one period.
+# ?format=columnar returns row lists as {"columns": [...], "data": [[...], ...]}.
+# /employee-roi/{id}, /project-profit/{id} and ?ids= read only the requested
+# entities (see entity_query) and add a per-project / per-employee breakdown.
+
+Period = Tuple[Optional[date], Optional[date]]
+
+
+def analytics_engine(engine: Optional[str] = None) -> str:
+    try:
+        return resolve_engine(engine)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def analytics_period(start: Optional[date] = None, end: Optional[date] = None) -> Period:
+    if start is not None and end is not None and start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    return start, end
+
+
+def response_format(fmt: str = Query("json", alias="format")) -> str:
+    if fmt not in RESPONSE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(RESPONSE_FORMATS)}")
+    return fmt
+
+
+# Snapshot parts that are row lists, and their row models
+SNAPSHOT_ROWS = {
+    "employee_roi": EmployeeROI,
+    "project_profit": ProjectProfit,
+    "department_summary": DepartmentSummary,
+}
+
+
+class RowQuery(NamedTuple):
+    """Sorting, top-N and filters for one analytics row list."""
+    order_by: Optional[str] = None  # row field; "-field" sorts descending
+    limit: Optional[int] = None
+    min_hours: Optional[float] = None
+    department: Optional[str] = None
+    project_id: Optional[int] = None
+
+    @property
+    def active(self) -> bool:
+        return any(value is not None for value in self)
+
+
+def row_query(
+    order_by: Optional[str] = Query(None, description="Row field to sort by; prefix with '-' for descending"),
+    limit: Optional[int] = Query(None, ge=1),
+    min_hours: Optional[float] = Query(None, ge=0),
+) -> RowQuery:
+    return RowQuery(order_by, limit, min_hours)
+
+
+# Ids accepted by one ?ids= lookup
+MAX_LOOKUP_IDS = 500
+
+
+def entity_ids(
+    ids: Optional[str] = Query(None, description="Comma-separated ids: only these rows, each with its breakdown"),
+) -> Optional[Tuple[int, ...]]:
+    if ids is None:
+        return None
+    try:
+        parsed = {int(part) for part in ids.split(",") if part.strip()}
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if not parsed:
+        raise HTTPException(status_code=400, detail="ids must list at least one id")
+    if len(parsed) > MAX_LOOKUP_IDS:
+        raise HTTPException(status_code=400, detail=f"ids accepts at most {MAX_LOOKUP_IDS} ids")
+    return tuple(sorted(parsed))
+
+
+def _checked(name: str, query: RowQuery) -> RowQuery:
+    fields = field_names(SNAPSHOT_ROWS[name])
+    if query.order_by is not None and query.order_by.removeprefix("-") not in fields:
+        raise HTTPException(status_code=400, detail=f"order_by must be one of {', '.join(fields)} (optionally prefixed with '-')")
+    return query
+
+
+def shape_rows(rows: list, name: str, fmt: str = "json"):
+    if fmt == "columnar" and name in SNAPSHOT_ROWS:
+        return columnar(rows, SNAPSHOT_ROWS[name])
+    return rows
+
+
 @router.get("/employee-roi", response_model=list[EmployeeROI])
-def employee_roi(db: Session = Depends(get_db)):
+async def get_employee_roi(
+    request: Request,
+    engine: str = Depends(analytics_engine),
+    period: Period = Depends(analytics_period),
+    fmt: str = Depends(response_format),
+    rows: RowQuery = Depends(row_query),
+    department: Optional[str] = None,
+    ids: Optional[Tuple[int, ...]] = Depends(entity_ids),
+    db: AsyncSession = Depends(get_async_db),
+):
+    query = _checked("employee_roi", rows._replace(department=department))
+    if ids is not None:
+        return await cached_response(request, db, lambda: _entity_rows(db, "employee_roi", ids, period, fmt, query))
+    return await cached_response(request, db, lambda: _snapshot_part(db, "employee_roi", engine, period, fmt, query))
+
+
+@router.get("/employee-roi/{employee_id}", response_model=EmployeeROIDetail)
+async def get_employee_detail(
+    request: Request,
+    employee_id: int,
+    period: Period = Depends(analytics_period),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """One employee's ROI row with a per-project breakdown, read by id without computing the full list."""
+    return await cached_response(request, db, lambda: _entity_detail(db, "employee_roi", employee_id, period))
+
+
+@router.get("/project-profit", response_model=list[ProjectProfit])
+async def get_project_profit(
+    request: Request,
+    engine: str = Depends(analytics_engine),
+    period: Period = Depends(analytics_period),
+    fmt: str = Depends(response_format),
+    rows: RowQuery = Depends(row_query),
+    project_id: Optional[int] = None,
+    ids: Optional[Tuple[int, ...]] = Depends(entity_ids),
+    db: AsyncSession = Depends(get_async_db),
+):
+    query = _checked("project_profit", rows._replace(project_id=project_id))
+    if ids is not None:
+        return await cached_response(request, db, lambda: _entity_rows(db, "project_profit", ids, period, fmt, query))
+    return await cached_response(request, db, lambda: _snapshot_part(db, "project_profit", engine, period, fmt, query))
+
+
+@router.get("/project-profit/{project_id}", response_model=ProjectProfitDetail)
+async def get_project_detail(
+    request: Request,
+    project_id: int,
+    period: Period = Depends(analytics_period),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """One project's profit row with a per-employee breakdown, read by id without computing the full list."""
+    return await cached_response(request, db, lambda: _entity_detail(db, "project_profit", project_id, period))
+
+
+@router.get("/department-summary", response_model=list[DepartmentSummary])
+async def get_department_summary(
+    request: Request,
+    engine: str = Depends(analytics_engine),
+    period: Period = Depends(analytics_period),
+    fmt: str = Depends(response_format),
+    rows: RowQuery = Depends(row_query),
+    department: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    query = _checked("department_summary", rows._replace(department=department))
+    return await cached_response(
+        request, db, lambda: _snapshot_part(db, "department_summary", engine, period, fmt, query)
+    )
+
+
+@router.get("/overall")
+async def get_overall(
+    request: Request,
+    engine: str = Depends(analytics_engine),
+    period: Period = Depends(analytics_period),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await cached_response(request, db, lambda: _snapshot_part(db, "overall", engine, period))
+
+
+@router.get("/snapshot", response_model=AnalyticsSnapshot)
+async def get_snapshot(
+    request: Request,
+    engine: str = Depends(analytics_engine),
+    period: Period = Depends(analytics_period),
+    fmt: str = Depends(response_format),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await cached_response(request, db, lambda: _shaped_snapshot(db, engine, period, fmt))
+
+
+@router.post("/scenarios", response_model=ScenarioResponse)
+async def evaluate_scenarios(scenario_request: ScenarioRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    What-if analytics for many rate/revenue override sets at once, without writing anything.
+
+    Every scenario is evaluated against the same loaded copy of the data
+    (the numpy engine's columnar store) in one vectorized pass, and comes
+    back as a full snapshot (employee_roi, project_profit,
+    department_summary, overall). A scenario with no overrides is the
+    baseline. Requires NumPy.
+    """
+    if not NUMPY_AVAILABLE:
+        raise HTTPException(status_code=400, detail="Scenarios require NumPy to be installed")
+    start, end = analytics_period(scenario_request.start, scenario_request.end)
+    scenarios = scenario_request.scenarios
+    version = await get_data_version_async(db)
+    loaded = await load_stale_tables(db, version)
+    try:
+        snapshots = await run_in_threadpool(columnar_store.scenarios, version, loaded, scenarios, start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    body = {
+        "data_version": version,
+        "scenarios": [{"name": scenario.name, **vars(snapshot)} for scenario, snapshot in zip(scenarios, snapshots)],
+    }
+    return Response(dumps(body), media_type="application/json")
+
+
+@router.get("/cache-stats")
+def cache_stats():
+    return analytics_cache.stats()
+
+
+async def _snapshot_part(
+    db: AsyncSession,
+    name: str,
+    engine: Optional[str] = None,
+    period: Period = (None, None),
+    fmt: str = "json",
+    query: RowQuery = RowQuery(),
+):
+    """
+    One part of the analytics for a route.
+
+    All-time parts on the SQL engine are read from their own rollup table
+    (O(rows of that part)); only periods and the numpy engine go through the
+    whole snapshot.
+    """
+    if resolve_engine(engine) == "sql" and period == (None, None):
+        if name == "overall":
+            return _overall_result(*(await db.execute(overall_query())).one())
+        return shape_rows(await part_rows_async(db, name, query, engine, period), name, fmt)
+    rows = getattr(await current_snapshot_async(db, engine, period), name)
+    return shape_rows(select_rows(rows, query) if query.active else rows, name, fmt)
+
+
+async def _entity_rows(
+    db: AsyncSession, name: str, ids: Tuple[int, ...], period: Period, fmt: str, query: RowQuery
+):
+    return shape_rows(select_rows(await entity_details_async(db, name, ids, period), query), name, fmt)
+
+
+async def _entity_detail(db: AsyncSession, name: str, entity_id: int, period: Period):
+    details = await entity_details_async(db, name, (entity_id,), period)
+    if not details:
+        kind = "Employee" if name == "employee_roi" else "Project"
+        raise HTTPException(status_code=404, detail=f"{kind} not found")
+    return details[0]
+
+
+async def _shaped_snapshot(db: AsyncSession, engine: Optional[str], period: Period, fmt: str):
+    snapshot = await current_snapshot_async(db, engine, period)
+    if fmt == "json":
+        return snapshot
+    return {name: shape_rows(getattr(snapshot, name), name, fmt) for name in (*SNAPSHOT_ROWS, "overall")}
+
+
+def part_rows(
+    db: Session, name: str, query: RowQuery, engine: Optional[str] = None, period: Period = (None, None)
+) -> list:
+    """
+    One row list with ``query`` applied.
+
+    All-time results on the SQL engine push the filters, ordering and limit
+    into one query over the rollup tables; periods and the numpy engine apply
+    them to the cached snapshot instead.
+    """
+    if resolve_engine(engine) == "sql" and period == (None, None):
+        return rollup_rows(db, name, query)
+    return select_rows(getattr(current_snapshot(db, engine, period), name), query)
+
+
+async def part_rows_async(
+    db: AsyncSession, name: str, query: RowQuery, engine: Optional[str] = None, period: Period = (None, None)
+) -> list:
+    """``part_rows`` over an async session."""
+    if resolve_engine(engine) == "sql" and period == (None, None):
+        result = await db.execute(rollup_query(name, query))
+        return [ROW_BUILDERS[name](row) for row in result.all()]
+    return select_rows(getattr(await current_snapshot_async(db, engine, period), name), query)
+
+
+def select_rows(rows: list, query: RowQuery) -> list:
+    """``query`` applied to snapshot rows in memory, ordered like ``rollup_query``."""
+    if query.min_hours is not None:
+        rows = [row for row in rows if row.total_hours >= query.min_hours]
+    if query.department is not None:
+        rows = [row for row in rows if row.department == query.department]
+    if query.project_id is not None:
+        rows = [row for row in rows if row.project_id == query.project_id]
+    if query.order_by is not None:
+        field = query.order_by.removeprefix("-")
+        # stable sorts keep the snapshot's key order among ties; NULLs go last
+        ranked = sorted(
+            (row for row in rows if getattr(row, field) is not None),
+            key=attrgetter(field),
+            reverse=query.order_by.startswith("-"),
+        )
+        rows = ranked + [row for row in rows if getattr(row, field) is None]
+    return rows[:query.limit] if query.limit is not None else list(rows)
+
+
+def current_snapshot(db: Session, engine: Optional[str] = None, period: Period = (None, None)) -> AnalyticsSnapshot:
+    """The snapshot for the current data version, built at most once per version, engine and period."""
+    engine = resolve_engine(engine)
+    version = get_data_version(db)
+    key = ("snapshot", engine, version, period)
+    snapshot = analytics_cache.get(key)
+    if snapshot is None:
+        if engine == "numpy":
+            snapshot = columnar_snapshot(db, version, *period)
+        else:
+            snapshot = build_snapshot(db, *period)
+        analytics_cache.put(key, snapshot)
+    return snapshot
+
+
+async def current_snapshot_async(
+    db: AsyncSession, engine: Optional[str] = None, period: Period = (None, None)
+) -> AnalyticsSnapshot:
+    """``current_snapshot`` over an async session; the in-memory pass runs in the threadpool."""
+    engine = resolve_engine(engine)
+    version = await get_data_version_async(db)
+    key = ("snapshot", engine, version, period)
+    snapshot = analytics_cache.get(key)
+    if snapshot is None:
+        if engine == "numpy":
+            loaded = await load_stale_tables(db, version)
+            snapshot = await run_in_threadpool(columnar_store.update, version, loaded, *period)
+        else:
+            rows = (await db.execute(snapshot_query(*period))).all()
+            snapshot = await run_in_threadpool(derive_snapshot, rows)
+        analytics_cache.put(key, snapshot)
+    return snapshot
+
+
+def build_snapshot(db: Session, start: Optional[date] = None, end: Optional[date] = None) -> AnalyticsSnapshot:
+    """
+    Compute all four analytics result sets from one (employee, project) grain read.
+
+    The grain rows come from the pair rollups and the project list is appended
+    to the same statement, so the snapshot reflects a single consistent read.
+    Employee, project, department and overall figures are then summed in memory.
+
+    With ``start``/``end`` the grain is aggregated from the timesheets in that
+    period instead (see ``snapshot_query``).
+    """
+    return derive_snapshot(db.execute(snapshot_query(start, end)).all())
+
+
+def period_filter(start: Optional[date], end: Optional[date]) -> list:
+    """WHERE conditions selecting timesheets worked between ``start`` and ``end`` (inclusive)."""
+    conditions = []
+    if start is not None:
+        conditions.append(Timesheet.work_date >= start)
+    if end is not None:
+        conditions.append(Timesheet.work_date <= end)
+    return conditions
+
+
+def _period_grain(start: Optional[date], end: Optional[date]):
+    """
+    (employee, project) hours and per-project allocation hours for one period.
+
+    Both scan only the period's rows through the work_date index; revenue is
+    allocated over the hours booked in the period, like the rollups do for
+    all of history.
+    """
+    window = period_filter(start, end)
+    pairs = (
+        select(
+            Timesheet.employee_id,
+            Timesheet.project_id,
+            func.sum(Timesheet.hours_worked).label("total_hours"),
+        )
+        .where(*window)
+        .group_by(Timesheet.employee_id, Timesheet.project_id)
+        .subquery("period_pairs")
+    )
+    allocation = (
+        select(Timesheet.project_id, func.sum(Timesheet.hours_worked).label("allocation_hours"))
+        .where(*window)
+        .group_by(Timesheet.project_id)
+        .subquery("period_projects")
+    )
+    return pairs, allocation
+
+
+def snapshot_query(start: Optional[date] = None, end: Optional[date] = None):
+    if start is None and end is None:
+        pairs = EmployeeProjectRollup.__table__
+        pair_cost = pairs.c.total_cost
+        allocation = ProjectRollup.__table__
+        project_filter = []
+    else:
+        pairs, allocation = _period_grain(start, end)
+        pair_cost = (pairs.c.total_hours * Employee.hourly_rate).label("total_cost")
+        # only projects worked on in the period count towards its revenue
+        project_filter = [Project.id.in_(select(allocation.c.project_id))]
+    grain = (
+        select(
+            pairs.c.employee_id,
+            Employee.name.label("employee_name"),
+            Employee.department.label("department"),
+            pairs.c.project_id,
+            cast(null(), String).label("project_name"),
+            cast(null(), Float).label("revenue"),
+            pairs.c.total_hours,
+            pair_cost,
+            allocation.c.allocation_hours,
+        )
+        .join(Employee, Employee.id == pairs.c.employee_id)
+        .outerjoin(allocation, allocation.c.project_id == pairs.c.project_id)
+    )
+    project_rows = select(
+        cast(null(), Integer).label("employee_id"),
+        cast(null(), String).label("employee_name"),
+        cast(null(), String).label("department"),
+        Project.id.label("project_id"),
+        Project.name.label("project_name"),
+        Project.revenue.label("revenue"),
+        cast(null(), Float).label("total_hours"),
+        cast(null(), Float).label("total_cost"),
+        cast(null(), Float).label("allocation_hours"),
+    ).where(*project_filter)
+    return union_all(grain, project_rows)
+
+
+def derive_snapshot(rows) -> AnalyticsSnapshot:
+    projects = {row.project_id: row for row in rows if row.employee_id is None}
+    total_cost = 0.0
+    by_employee = {}
+    by_project = defaultdict(lambda: [0.0, 0.0])
+    for row in rows:
+        if row.employee_id is None:
+            continue
+        total_cost += row.total_cost
+        project = projects.get(row.project_id)
+        if project is None:
+            continue
+        # hours / project hours * project revenue; no revenue when the project has no hours
+        revenue = (row.total_hours / row.allocation_hours) * project.revenue if row.allocation_hours else 0.0
+        employee = by_employee.setdefault(
+            row.employee_id, [row.employee_name, row.department, 0.0, 0.0, 0.0]
+        )
+        employee[2] += row.total_hours
+        employee[3] += row.total_cost
+        employee[4] += revenue
+        by_project[row.project_id][0] += row.total_hours
+        by_project[row.project_id][1] += row.total_cost
+
+    by_department = defaultdict(lambda: [0.0, 0.0, 0.0])
+    for name, department, hours, cost, revenue in by_employee.values():
+        totals = by_department[department]
+        totals[0] += hours
+        totals[1] += cost
+        totals[2] += revenue
+
+    return AnalyticsSnapshot(
+        employee_roi=[
+            _employee_roi_row(SimpleNamespace(
+                employee_id=employee_id, employee_name=name, department=department,
+                total_hours=hours, total_cost=cost, total_revenue=revenue,
+            ))
+            for employee_id, (name, department, hours, cost, revenue) in sorted(by_employee.items())
+        ],
+        project_profit=[
+            _project_profit_row(SimpleNamespace(
+                project_id=project_id, project_name=projects[project_id].project_name,
+                total_hours=hours, total_cost=cost, total_revenue=projects[project_id].revenue,
+            ))
+            for project_id, (hours, cost) in sorted(by_project.items())
+        ],
+        department_summary=[
+            _department_summary_row(SimpleNamespace(
+                department=department, total_hours=hours, total_cost=cost, total_revenue=revenue,
+            ))
+            for department, (hours, cost, revenue) in sorted(
+                by_department.items(), key=lambda item: (item[0] is not None, item[0] or "")
+            )
+        ],
+        overall=_overall_result(total_cost, sum(project.revenue for project in projects.values())),
+    )
+
+
+# Drill-down: a few entities' rows with their breakdowns, read by id
+
+def _entity_grain(name: str, ids: Tuple[int, ...], start: Optional[date], end: Optional[date]):
+    """
+    (pair rows, per-project allocation hours, pair cost) covering only the
+    requested entities' (employee, project) pairs and the projects they touch.
+
+    All-time figures come from the rollups by primary key / project index.
+    For a period, only the entities' timesheets are aggregated (through the
+    employee or project index), plus the period hours of the projects needed
+    for the revenue shares.
+    """
+    if start is None and end is None:
+        pairs = EmployeeProjectRollup.__table__
+        return pairs, ProjectRollup.__table__, pairs.c.total_cost
+    window = period_filter(start, end)
+    key = Timesheet.employee_id if name == "employee_roi" else Timesheet.project_id
+    pairs = (
+        select(
+            Timesheet.employee_id,
+            Timesheet.project_id,
+            func.sum(Timesheet.hours_worked).label("total_hours"),
+        )
+        .where(key.in_(ids), *window)
+        .group_by(Timesheet.employee_id, Timesheet.project_id)
+        .subquery("entity_pairs")
+    )
+    project_ids = select(pairs.c.project_id) if name == "employee_roi" else ids
+    allocation = (
+        select(Timesheet.project_id, func.sum(Timesheet.hours_worked).label("allocation_hours"))
+        .where(Timesheet.project_id.in_(project_ids), *window)
+        .group_by(Timesheet.project_id)
+        .subquery("entity_projects")
+    )
+    return pairs, allocation, (pairs.c.total_hours * Employee.hourly_rate).label("total_cost")
+
+
+def entity_query(name: str, ids: Tuple[int, ...], start: Optional[date] = None, end: Optional[date] = None):
+    """
+    One statement with the breakdown rows of the ``ids`` employees
+    (``name="employee_roi"``) or projects (``"project_profit"``), followed by
+    one row per entity (``part_id`` NULL) carrying its name and, for all-time
+    queries, its rollup totals.
+    """
+    pairs, allocation, pair_cost = _entity_grain(name, ids, start, end)
+    all_time = start is None and end is None
+    if name == "employee_roi":
+        breakdown = (
+            select(
+                pairs.c.employee_id.label("entity_id"),
+                pairs.c.project_id.label("part_id"),
+                Project.name.label("name"),
+                cast(null(), String).label("department"),
+                pairs.c.total_hours,
+                pair_cost,
+                Project.revenue.label("revenue"),
+                allocation.c.allocation_hours,
+            )
+            .join(Project, Project.id == pairs.c.project_id)
+            .outerjoin(allocation, allocation.c.project_id == pairs.c.project_id)
+        )
+        if all_time:
+            breakdown = breakdown.where(pairs.c.employee_id.in_(ids))
+        else:
+            breakdown = breakdown.join(Employee, Employee.id == pairs.c.employee_id)
+        entities = select(
+            Employee.id.label("entity_id"),
+            cast(null(), Integer).label("part_id"),
+            Employee.name.label("name"),
+            Employee.department.label("department"),
+            EmployeeRollup.total_hours if all_time else cast(null(), Float).label("total_hours"),
+            EmployeeRollup.total_cost if all_time else cast(null(), Float).label("total_cost"),
+            EmployeeRollup.total_revenue.label("revenue") if all_time else cast(null(), Float).label("revenue"),
+            cast(null(), Float).label("allocation_hours"),
+        ).where(Employee.id.in_(ids))
+        if all_time:
+            entities = entities.outerjoin(EmployeeRollup, EmployeeRollup.employee_id == Employee.id)
+        return union_all(breakdown, entities)
+
+    breakdown = (
+        select(
+            pairs.c.project_id.label("entity_id"),
+            pairs.c.employee_id.label("part_id"),
+            Employee.name.label("name"),
+            Employee.department.label("department"),
+            pairs.c.total_hours,
+            pair_cost,
+            cast(null(), Float).label("revenue"),
+            allocation.c.allocation_hours,
+        )
+        .join(Employee, Employee.id == pairs.c.employee_id)
+        .outerjoin(allocation, allocation.c.project_id == pairs.c.project_id)
+    )
+    if all_time:
+        breakdown = breakdown.where(pairs.c.project_id.in_(ids))
+    entities = select(
+        Project.id.label("entity_id"),
+        cast(null(), Integer).label("part_id"),
+        Project.name.label("name"),
+        cast(null(), String).label("department"),
+        ProjectRollup.total_hours if all_time else cast(null(), Float).label("total_hours"),
+        ProjectRollup.total_cost if all_time else cast(null(), Float).label("total_cost"),
+        Project.revenue.label("revenue"),
+        cast(null(), Float).label("allocation_hours"),
+    ).where(Project.id.in_(ids))
+    if all_time:
+        entities = entities.outerjoin(ProjectRollup, ProjectRollup.project_id == Project.id)
+    return union_all(breakdown, entities)
+
+
+def derive_details(name: str, rows) -> list:
+    """Detail rows (row fields plus breakdown) in id order from ``entity_query`` rows; unknown ids are left out."""
+    entities = {row.entity_id: row for row in rows if row.part_id is None}
+    parts = defaultdict(list)
+    for row in rows:
+        if row.part_id is not None and row.entity_id in entities:
+            parts[row.entity_id].append(row)
+
+    details = []
+    for entity_id, entity in sorted(entities.items()):
+        breakdown = []
+        for row in sorted(parts[entity_id], key=attrgetter("part_id")):
+            revenue = entity.revenue if name == "project_profit" else row.revenue
+            # hours / project hours * project revenue; no revenue when the project has no hours
+            share = (row.total_hours / row.allocation_hours) * revenue if row.allocation_hours else 0.0
+            fields = dict(total_hours=row.total_hours, total_cost=row.total_cost, total_revenue=share)
+            if name == "employee_roi":
+                breakdown.append(_employee_project_share(SimpleNamespace(
+                    project_id=row.part_id, project_name=row.name, **fields,
+                )))
+            else:
+                breakdown.append(_employee_roi_row(SimpleNamespace(
+                    employee_id=row.part_id, employee_name=row.name, department=row.department, **fields,
+                )))
+        # all-time totals come from the rollups; period totals are the breakdown's sums
+        hours = entity.total_hours if entity.total_hours is not None else sum(p.total_hours for p in breakdown)
+        cost = entity.total_cost if entity.total_cost is not None else sum(p.total_cost for p in breakdown)
+        if name == "employee_roi":
+            revenue = entity.revenue if entity.revenue is not None else sum(p.total_revenue for p in breakdown)
+            row = _employee_roi_row(SimpleNamespace(
+                employee_id=entity_id, employee_name=entity.name, department=entity.department,
+                total_hours=hours, total_cost=cost, total_revenue=revenue,
+            ))
+            details.append(EmployeeROIDetail(**vars(row), projects=breakdown))
+        else:
+            row = _project_profit_row(SimpleNamespace(
+                project_id=entity_id, project_name=entity.name,
+                total_hours=hours, total_cost=cost, total_revenue=entity.revenue,
+            ))
+            details.append(ProjectProfitDetail(**vars(row), employees=breakdown))
+    return details
+
+
+def entity_details(db: Session, name: str, ids: Tuple[int, ...], period: Period = (None, None)) -> list:
+    """Detail rows of the ``ids`` employees or projects, unknown ids left out."""
+    return derive_details(name, db.execute(entity_query(name, ids, *period)).all())
+
+
+async def entity_details_async(
+    db: AsyncSession, name: str, ids: Tuple[int, ...], period: Period = (None, None)
+) -> list:
+    """``entity_details`` over an async session."""
+    rows = (await db.execute(entity_query(name, ids, *period))).all()
+    return await run_in_threadpool(derive_details, name, rows)
+
+
+# Direct reads of the rollup tables, O(employees) / O(projects)
+
+def _ratio(numerator, denominator):
+    # NULL when the denominator is 0, like the row builders
+    return case((denominator != 0, numerator / denominator), else_=null())
+
+
+def _rollup_columns(name: str):
+    """(statement, {row field: SQL expression}, key field) for one row list over the rollups."""
+    if name == "employee_roi":
+        # served from the employee rollups kept in sync by every write path
+        fields = {
+            "employee_id": Employee.id,
+            "employee_name": Employee.name,
+            "department": Employee.department,
+            "total_hours": EmployeeRollup.total_hours,
+            "total_cost": EmployeeRollup.total_cost,
+            "total_revenue": EmployeeRollup.total_revenue,
+            "roi": _ratio(EmployeeRollup.total_revenue, EmployeeRollup.total_cost),
+        }
+        stmt = select(*(column.label(field) for field, column in fields.items())).join_from(
+            Employee, EmployeeRollup, EmployeeRollup.employee_id == Employee.id
+        )
+        return stmt, fields, "employee_id"
+    if name == "project_profit":
+        profit = Project.revenue - ProjectRollup.total_cost
+        fields = {
+            "project_id": Project.id,
+            "project_name": Project.name,
+            "total_hours": ProjectRollup.total_hours,
+            "total_cost": ProjectRollup.total_cost,
+            "total_revenue": Project.revenue,
+            "profit": profit,
+            "profit_margin": _ratio(profit, Project.revenue),
+        }
+        stmt = (
+            select(*(column.label(field) for field, column in fields.items()))
+            .join_from(Project, ProjectRollup, ProjectRollup.project_id == Project.id)
+            .where(ProjectRollup.entries > 0)
+        )
+        return stmt, fields, "project_id"
+    fields = {
+        "department": DepartmentRollup.department,
+        "total_hours": DepartmentRollup.total_hours,
+        "total_cost": DepartmentRollup.total_cost,
+        "total_revenue": DepartmentRollup.total_revenue,
+        "roi": _ratio(DepartmentRollup.total_revenue, DepartmentRollup.total_cost),
+    }
+    return select(*(column.label(field) for field, column in fields.items())), fields, "department"
+
+
+def rollup_query(name: str, query: RowQuery = RowQuery()):
+    """
+    One row list as a single statement with ``query``'s filters, ordering and
+    limit applied in the database, so a top-N costs a bounded sort.
+
+    Rows come in key order (ids; departments with NULL first) unless
+    ``order_by`` is given, which sorts NULLs last and breaks ties by key.
+    """
+    stmt, fields, key = _rollup_columns(name)
+    if query.min_hours is not None:
+        stmt = stmt.where(fields["total_hours"] >= query.min_hours)
+    if query.department is not None:
+        stmt = stmt.where(fields["department"] == query.department)
+    if query.project_id is not None:
+        stmt = stmt.where(fields["project_id"] == query.project_id)
+    key_order = fields[key].asc().nulls_first() if key == "department" else fields[key].asc()
+    if query.order_by is not None:
+        column = fields[query.order_by.removeprefix("-")]
+        direction = column.desc() if query.order_by.startswith("-") else column.asc()
+        stmt = stmt.order_by(direction.nulls_last(), key_order)
+    else:
+        stmt = stmt.order_by(key_order)
+    if query.limit is not None:
+        stmt = stmt.limit(query.limit)
+    return stmt
+
+
+def rollup_rows(db: Session, name: str, query: RowQuery = RowQuery()) -> list:
+    return [ROW_BUILDERS[name](row) for row in db.execute(rollup_query(name, query)).all()]
+
+
+def employee_roi(db: Session):
+    return rollup_rows(db, "employee_roi")
+
+
+def project_profit(db: Session):
+    return rollup_rows(db, "project_profit")
+
+
+def department_summary(db: Session):
+    return rollup_rows(db, "department_summary")
+
+
+def overall_query():
+    """(total_cost, total_revenue) in one statement over the project rollups and projects."""
+    # total cost = sum(hours * rate), already summed per project
+    total_cost = select(func.coalesce(func.sum(ProjectRollup.total_cost), 0.0)).scalar_subquery()
+    # total revenue = sum(Project.revenue) once per project
+    total_revenue = select(func.coalesce(func.sum(Project.revenue), 0.0)).scalar_subquery()
+    return select(total_cost.label("total_cost"), total_revenue.label("total_revenue"))
+
+
+def overall(db: Session):
+    return _overall_result(*db.execute(overall_query()).one())
+
+
+def _employee_roi_row(row) -> EmployeeROI:
+    total_cost = float(row.total_cost or 0)
+    total_revenue = float(row.total_revenue or 0)
+    roi = (total_revenue / total_cost) if total_cost else None
+    return EmployeeROI(
+        employee_id=row.employee_id,
+        employee_name=row.employee_name,
+        department=row.department,
+        total_hours=float(row.total_hours or 0),
+        total_cost=total_cost,
+        total_revenue=total_revenue,
+        roi=roi,
+    )
+
+
+def _employee_project_share(row) -> EmployeeProjectShare:
+    total_cost = float(row.total_cost or 0)
+    total_revenue = float(row.total_revenue or 0)
+    roi = (total_revenue / total_cost) if total_cost else None
+    return EmployeeProjectShare(
+        project_id=row.project_id,
+        project_name=row.project_name,
+        total_hours=float(row.total_hours or 0),
+        total_cost=total_cost,
+        total_revenue=total_revenue,
+        roi=roi,
+    )
+
+
+def _project_profit_row(row) -> ProjectProfit:
+    total_cost = float(row.total_cost or 0)
+    total_revenue = float(row.total_revenue or 0)
+    profit = total_revenue - total_cost
+    profit_margin = (profit / total_revenue) if total_revenue else None
+    return ProjectProfit(
+        project_id=row.project_id,
+        project_name=row.project_name,
+        total_hours=float(row.total_hours or 0),
+        total_cost=total_cost,
+        total_revenue=total_revenue,
+        profit=profit,
+        profit_margin=profit_margin,
+    )
+
+
+def _department_summary_row(row) -> DepartmentSummary:
+    total_cost = float(row.total_cost or 0)
+    total_revenue = float(row.total_revenue or 0)
+    roi = (total_revenue / total_cost) if total_cost else None
+    return DepartmentSummary(
+        department=row.department,
+        total_hours=float(row.total_hours or 0),
+        total_cost=total_cost,
+        total_revenue=total_revenue,
+        roi=roi,
+    )
+
+
+ROW_BUILDERS = {
+    "employee_roi": _employee_roi_row,
+    "project_profit": _project_profit_row,
+    "department_summary": _department_summary_row,
+}
+
+
+def _overall_result(total_cost, total_revenue) -> dict:
+    roi = (float(total_revenue) / float(total_cost)) if total_cost else None
+    return {
+        "total_cost": float(total_cost or 0),
+        "total_revenue": float(total_revenue or 0),
+        "roi": roi,
+    }
+
+
+# Live queries straight over the timesheets; used to verify the rollups
+# (see app.utils.rollups check).
+
+def employee_roi_live(db: Session):
     # total hours per project for revenue allocation
     project_hours_subq = (
         db.query(
@@ -41,27 +897,10 @@ def employee_roi(db: Session = Depends(get_db)):
         .group_by(Employee.id, Employee.name, Employee.department)
     )
 
-    results = []
-    for row in q.all():
-        total_cost = float(row.total_cost or 0)
-        total_revenue = float(row.total_revenue or 0)
-        roi = (total_revenue / total_cost) if total_cost else None
-        results.append(
-            EmployeeROI(
-                employee_id=row.employee_id,
-                employee_name=row.employee_name,
-                department=row.department,
-                total_hours=float(row.total_hours or 0),
-                total_cost=total_cost,
-                total_revenue=total_revenue,
-                roi=roi,
-            )
-        )
-    return results
+    return [_employee_roi_row(row) for row in q.all()]
 
 
-@router.get("/project-profit", response_model=list[ProjectProfit])
-def project_profit(db: Session = Depends(get_db)):
+def project_profit_live(db: Session):
     # total labor cost per project
     q = (
         db.query(
@@ -76,28 +915,10 @@ def project_profit(db: Session = Depends(get_db)):
         .group_by(Project.id, Project.name, Project.revenue)
     )
 
-    results = []
-    for row in q.all():
-        total_cost = float(row.total_cost or 0)
-        total_revenue = float(row.total_revenue or 0)
-        profit = total_revenue - total_cost
-        profit_margin = (profit / total_revenue) if total_revenue else None
-        results.append(
-            ProjectProfit(
-                project_id=row.project_id,
-                project_name=row.project_name,
-                total_hours=float(row.total_hours or 0),
-                total_cost=total_cost,
-                total_revenue=total_revenue,
-                profit=profit,
-                profit_margin=profit_margin,
-            )
-        )
-    return results
+    return [_project_profit_row(row) for row in q.all()]
 
 
-@router.get("/department-summary", response_model=list[DepartmentSummary])
-def department_summary(db: Session = Depends(get_db)):
+def department_summary_live(db: Session):
     # Need project hours per project for revenue allocation per timesheet row
     project_hours_subq = (
         db.query(
@@ -124,25 +945,10 @@ def department_summary(db: Session = Depends(get_db)):
         .group_by(Employee.department)
     )
 
-    results = []
-    for row in q.all():
-        total_cost = float(row.total_cost or 0)
-        total_revenue = float(row.total_revenue or 0)
-        roi = (total_revenue / total_cost) if total_cost else None
-        results.append(
-            DepartmentSummary(
-                department=row.department,
-                total_hours=float(row.total_hours or 0),
-                total_cost=total_cost,
-                total_revenue=total_revenue,
-                roi=roi,
-            )
-        )
-    return results
+    return [_department_summary_row(row) for row in q.all()]
 
 
-@router.get("/overall")
-def overall(db: Session = Depends(get_db)):
+def overall_live(db: Session):
     # total cost = sum(hours * rate)
     total_cost = (
         db.query(func.coalesce(func.sum(Timesheet.hours_worked * Employee.hourly_rate), 0.0))
@@ -153,11 +959,6 @@ def overall(db: Session = Depends(get_db)):
     # total revenue = sum(Project.revenue) once per project
     total_revenue = db.query(func.coalesce(func.sum(Project.revenue), 0.0)).scalar()
 
-    roi = (float(total_revenue) / float(total_cost)) if total_cost else None
-    return {
-        "total_cost": float(total_cost or 0),
-        "total_revenue": float(total_revenue or 0),
-        "roi": roi,
-    }
+    return _overall_result(total_cost, total_revenue)
 
 
@@ -1,8 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.database import get_db
+from app.db.database import get_async_db, get_db
 from app.models.employee import Employee
-from app.schemas.employee_schema import EmployeeCreate, EmployeeResponse
+from app.schemas.batch_schema import BatchResponse
+from app.schemas.employee_schema import EmployeeBatch, EmployeeCreate, EmployeeResponse
+from app.utils.batch import apply_batch
+from app.utils.cache import bump_data_version
+from app.utils.pagination import MAX_PAGE_SIZE, keyset_page, ndjson_response, wants_ndjson
+from app.utils.rollups import RollupChanges, apply_rollup_changes
 
 router = APIRouter(prefix="/employees", tags=["Employees"])
 
@@ -10,17 +17,55 @@ router = APIRouter(prefix="/employees", tags=["Employees"])
 def create_employee(employee: EmployeeCreate, db: Session = Depends(get_db)):
     db_employee = Employee(**employee.dict())
     db.add(db_employee)
+    db.flush()
+    changes = RollupChanges()
+    changes.employee_changed(db_employee.id)
+    apply_rollup_changes(db, changes)
+    bump_data_version(db, "employees")
     db.commit()
     db.refresh(db_employee)
     return db_employee
 
+@router.post("/batch", response_model=BatchResponse)
+def batch_employees(batch: EmployeeBatch, db: Session = Depends(get_db)):
+    """
+    Apply many create/update/delete operations in one transaction.
+
+    Returns a status per operation (created ids included) without re-reading rows.
+    """
+    try:
+        result = apply_batch(db, "employees", batch.operations)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error applying batch: {str(e)}")
+    return result
+
 @router.get("/", response_model=list[EmployeeResponse])
-def get_all_employees(db: Session = Depends(get_db)):
-    return db.query(Employee).all()
+async def get_all_employees(
+    request: Request,
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: int | None = None,
+    department: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    List employees ordered by id, one keyset page at a time (``after`` = last id seen).
+
+    With ``Accept: application/x-ndjson`` all matching rows are streamed instead.
+    """
+    stmt = select(Employee)
+    if department is not None:
+        stmt = stmt.where(Employee.department == department)
+    if wants_ndjson(request):
+        columns = [Employee.__table__.c[field] for field in EmployeeResponse.__fields__]
+        return ndjson_response(stmt.with_only_columns(*columns), Employee.id, limit, after)
+    return await keyset_page(db, stmt, Employee.id, request, response, limit, after)
 
 @router.get("/{employee_id}", response_model=EmployeeResponse)
-def get_employee(employee_id: int, db: Session = Depends(get_db)):
-    emp = db.query(Employee).filter(Employee.id == employee_id).first()
+async def get_employee(employee_id: int, db: AsyncSession = Depends(get_async_db)):
+    emp = await db.get(Employee, employee_id)
     if not emp:
         raise HTTPException(status_code=404, detail="Employee not found")
     return emp
@@ -30,8 +75,12 @@ def update_employee(employee_id: int, updated: EmployeeCreate, db: Session = Dep
     emp = db.query(Employee).filter(Employee.id == employee_id).first()
     if not emp:
         raise HTTPException(status_code=404, detail="Employee not found")
+    changes = RollupChanges()
+    changes.employee_changed(emp.id, emp.department)
     for key, value in updated.dict().items():
         setattr(emp, key, value)
+    apply_rollup_changes(db, changes)
+    bump_data_version(db, "employees")
     db.commit()
     db.refresh(emp)
     return emp
@@ -41,6 +90,10 @@ def delete_employee(employee_id: int, db: Session = Depends(get_db)):
     emp = db.query(Employee).filter(Employee.id == employee_id).first()
     if not emp:
         raise HTTPException(status_code=404, detail="Employee not found")
+    changes = RollupChanges()
+    changes.employee_changed(emp.id, emp.department)
     db.delete(emp)
+    apply_rollup_changes(db, changes)
+    bump_data_version(db, "employees")
     db.commit()
     return {"status": "deleted", "employee_id": employee_id}
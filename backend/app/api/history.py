@@ -0,0 +1,136 @@
+from datetime import datetime
+from typing import NamedTuple, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_async_db
+from app.schemas.history_schema import HistoryPoint, ProjectHistoryPoint, RecordedSnapshotResponse
+from app.utils.history import history_key, history_rows, snapshots, take_snapshot
+
+router = APIRouter(prefix="/analytics/history", tags=["Analytics"])
+
+
+# Series are read from the recorded snapshots (see app.utils.history), oldest
+# first: one point per recorded data version, thinned by the retention policy.
+# ?since=&until= bound taken_at; ?limit= keeps the most recent points.
+
+class HistoryWindow(NamedTuple):
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    limit: Optional[int] = None
+
+
+def history_window(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: Optional[int] = Query(None, ge=1, description="Return only the most recent points"),
+) -> HistoryWindow:
+    if since is not None and until is not None and since > until:
+        raise HTTPException(status_code=400, detail="since must not be after until")
+    return HistoryWindow(since, until, limit)
+
+
+async def _series(db: AsyncSession, stmt, window: HistoryWindow, order_column) -> list:
+    """Rows of ``stmt`` within ``window``, in time order."""
+    if window.since is not None:
+        stmt = stmt.where(snapshots.c.taken_at >= window.since)
+    if window.until is not None:
+        stmt = stmt.where(snapshots.c.taken_at <= window.until)
+    if window.limit is None:
+        return (await db.execute(stmt.order_by(order_column))).all()
+    # the newest points, put back in time order
+    rows = (await db.execute(stmt.order_by(order_column.desc()).limit(window.limit))).all()
+    return rows[::-1]
+
+
+def _roi_point(row) -> HistoryPoint:
+    return HistoryPoint(
+        taken_at=row.taken_at,
+        data_version=row.data_version,
+        total_hours=row.total_hours,
+        total_cost=row.total_cost,
+        total_revenue=row.total_revenue,
+        roi=(row.total_revenue / row.total_cost) if row.total_cost else None,
+    )
+
+
+def _profit_point(row) -> ProjectHistoryPoint:
+    profit = row.total_revenue - row.total_cost
+    return ProjectHistoryPoint(
+        taken_at=row.taken_at,
+        data_version=row.data_version,
+        total_hours=row.total_hours,
+        total_cost=row.total_cost,
+        total_revenue=row.total_revenue,
+        profit=profit,
+        profit_margin=(profit / row.total_revenue) if row.total_revenue else None,
+    )
+
+
+async def _entity_series(db: AsyncSession, kind: str, key, window: HistoryWindow) -> list:
+    # one range scan of the (kind, key, snapshot_id) primary key; snapshot ids grow with taken_at
+    stmt = (
+        select(
+            snapshots.c.taken_at,
+            snapshots.c.data_version,
+            history_rows.c.total_hours,
+            history_rows.c.total_cost,
+            history_rows.c.total_revenue,
+        )
+        .join(snapshots, snapshots.c.id == history_rows.c.snapshot_id)
+        .where(history_rows.c.kind == kind, history_rows.c.key == history_key(key))
+    )
+    return await _series(db, stmt, window, history_rows.c.snapshot_id)
+
+
+@router.get("/overall", response_model=list[HistoryPoint])
+async def overall_history(
+    window: HistoryWindow = Depends(history_window), db: AsyncSession = Depends(get_async_db)
+):
+    stmt = select(
+        snapshots.c.taken_at,
+        snapshots.c.data_version,
+        snapshots.c.total_hours,
+        snapshots.c.total_cost,
+        snapshots.c.total_revenue,
+    )
+    return [_roi_point(row) for row in await _series(db, stmt, window, snapshots.c.taken_at)]
+
+
+@router.get("/employees/{employee_id}", response_model=list[HistoryPoint])
+async def employee_history(
+    employee_id: int, window: HistoryWindow = Depends(history_window), db: AsyncSession = Depends(get_async_db)
+):
+    return [_roi_point(row) for row in await _entity_series(db, "employee", employee_id, window)]
+
+
+@router.get("/projects/{project_id}", response_model=list[ProjectHistoryPoint])
+async def project_history(
+    project_id: int, window: HistoryWindow = Depends(history_window), db: AsyncSession = Depends(get_async_db)
+):
+    return [_profit_point(row) for row in await _entity_series(db, "project", project_id, window)]
+
+
+@router.get("/departments/{department}", response_model=list[HistoryPoint])
+async def department_history(
+    department: str, window: HistoryWindow = Depends(history_window), db: AsyncSession = Depends(get_async_db)
+):
+    return [_roi_point(row) for row in await _entity_series(db, "department", department, window)]
+
+
+@router.post("/snapshots", response_model=RecordedSnapshotResponse)
+async def record_history_snapshot():
+    """
+    Record the current analytics snapshot now (and apply the retention policy).
+
+    Idempotent per data version: ``created`` is false when the current data
+    was already recorded.
+    """
+    recorded = await run_in_threadpool(take_snapshot)
+    return RecordedSnapshotResponse(
+        snapshot_id=recorded.id,
+        data_version=recorded.data_version,
+        taken_at=recorded.taken_at,
+        created=recorded.created,
+    )
@@ -1,8 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.database import get_db
+from app.db.database import get_async_db, get_db
 from app.models.project import Project
-from app.schemas.project_schema import ProjectCreate, ProjectResponse
+from app.schemas.batch_schema import BatchResponse
+from app.schemas.project_schema import ProjectBatch, ProjectCreate, ProjectResponse
+from app.utils.batch import apply_batch
+from app.utils.cache import bump_data_version
+from app.utils.pagination import MAX_PAGE_SIZE, keyset_page, ndjson_response, wants_ndjson
+from app.utils.rollups import RollupChanges, apply_rollup_changes
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
 
@@ -10,17 +17,52 @@ router = APIRouter(prefix="/projects", tags=["Projects"])
 def create_project(project: ProjectCreate, db: Session = Depends(get_db)):
     db_project = Project(**project.dict())
     db.add(db_project)
+    db.flush()
+    changes = RollupChanges()
+    changes.project_changed(db_project.id)
+    apply_rollup_changes(db, changes)
+    bump_data_version(db, "projects")
     db.commit()
     db.refresh(db_project)
     return db_project
 
+@router.post("/batch", response_model=BatchResponse)
+def batch_projects(batch: ProjectBatch, db: Session = Depends(get_db)):
+    """
+    Apply many create/update/delete operations in one transaction.
+
+    Returns a status per operation (created ids included) without re-reading rows.
+    """
+    try:
+        result = apply_batch(db, "projects", batch.operations)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error applying batch: {str(e)}")
+    return result
+
 @router.get("/", response_model=list[ProjectResponse])
-def get_all_projects(db: Session = Depends(get_db)):
-    return db.query(Project).all()
+async def get_all_projects(
+    request: Request,
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: int | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    List projects ordered by id, one keyset page at a time (``after`` = last id seen).
+
+    With ``Accept: application/x-ndjson`` all matching rows are streamed instead.
+    """
+    stmt = select(Project)
+    if wants_ndjson(request):
+        columns = [Project.__table__.c[field] for field in ProjectResponse.__fields__]
+        return ndjson_response(stmt.with_only_columns(*columns), Project.id, limit, after)
+    return await keyset_page(db, stmt, Project.id, request, response, limit, after)
 
 @router.get("/{project_id}", response_model=ProjectResponse)
-def get_project(project_id: int, db: Session = Depends(get_db)):
-    proj = db.query(Project).filter(Project.id == project_id).first()
+async def get_project(project_id: int, db: AsyncSession = Depends(get_async_db)):
+    proj = await db.get(Project, project_id)
     if not proj:
         raise HTTPException(status_code=404, detail="Project not found")
     return proj
@@ -32,6 +74,10 @@ def update_project(project_id: int, updated: ProjectCreate, db: Session = Depend
         raise HTTPException(status_code=404, detail="Project not found")
     for key, value in updated.dict().items():
         setattr(proj, key, value)
+    changes = RollupChanges()
+    changes.project_changed(proj.id)
+    apply_rollup_changes(db, changes)
+    bump_data_version(db, "projects")
     db.commit()
     db.refresh(proj)
     return proj
@@ -41,6 +87,10 @@ def delete_project(project_id: int, db: Session = Depends(get_db)):
     proj = db.query(Project).filter(Project.id == project_id).first()
     if not proj:
         raise HTTPException(status_code=404, detail="Project not found")
+    changes = RollupChanges()
+    changes.project_changed(proj.id)
     db.delete(proj)
+    apply_rollup_changes(db, changes)
+    bump_data_version(db, "projects")
     db.commit()
     return {"status": "deleted", "project_id": project_id}
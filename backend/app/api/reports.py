@@ -1,61 +1,189 @@
+import asyncio
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from app.db.database import get_db
-from app.api.analytics import employee_roi, project_profit, department_summary, overall
-from app.utils.report_generator import generate_excel_report, generate_pdf_report
+from app.db.database import get_read_db
+from app.api.analytics import (
+    Period, RowQuery, analytics_period, current_snapshot, overall, part_rows, period_filter,
+)
+from app.schemas.report_schema import ReportJobCreate, ReportJobResponse
+from app.utils.arrow_io import (
+    EXPORT_FORMATS, EXPORT_SCHEMAS, PYARROW_AVAILABLE, export_rows, stream_export, timesheet_batches,
+)
+from app.utils.cache import get_data_version
+from app.utils.metrics import timed_stream
+from app.utils.report_generator import stream_excel_report
+from app.utils.report_jobs import REPORT_FORMATS, ReportJob, report_jobs
 
 router = APIRouter(prefix="/report", tags=["Reports"])
 
 
+def _check_report_type(report_type: str, exports: bool = False) -> None:
+    if report_type in REPORT_FORMATS or (exports and report_type in EXPORT_FORMATS):
+        return
+    allowed = "'excel', 'pdf', 'parquet' or 'arrow'" if exports else "'excel' or 'pdf'"
+    raise HTTPException(
+        status_code=400, 
+        detail={"error": f"Invalid report type. Use {allowed}."}
+    )
+
+
+def _period_label(period: Period) -> str:
+    start, end = period
+    return "" if start is None and end is None else f"{start or ''}..{end or ''}"
+
+
+# The PDF lists the overall figures and the top employees by ROI
+PDF_TOP_EMPLOYEES = RowQuery(order_by="-roi", limit=5)
+
+
+def _report_data(report_type: str, db: Session, period: Period) -> dict:
+    if report_type != "pdf":
+        return current_snapshot(db, period=period).dict()
+    # top-N pushed into SQL (a bounded sort) instead of ranking every employee
+    top = part_rows(db, "employee_roi", PDF_TOP_EMPLOYEES, period=period)
+    totals = overall(db) if period == (None, None) else current_snapshot(db, period=period).overall
+    return {"employee_roi": [row.dict() for row in top], "overall": totals}
+
+
+def _submit_job(report_type: str, db: Session, period: Period = (None, None)) -> ReportJob:
+    return report_jobs.submit(
+        report_type,
+        get_data_version(db),
+        lambda: _report_data(report_type, db, period),
+        _period_label(period),
+    )
+
+
+def _export_batches(table: str, db: Session, period: Period):
+    """Record batches (lists of rows) for one exported table."""
+    if table == "timesheets":
+        return timesheet_batches(period_filter(*period))
+    snapshot = current_snapshot(db, period=period)
+    if table == "overall":
+        return iter([[snapshot.overall]])
+    return export_rows(getattr(snapshot, table))
+
+
+def _export_response(report_type: str, table: str, db: Session, period: Period) -> StreamingResponse:
+    extension, media_type = EXPORT_FORMATS[report_type]
+    filename = f"{table}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    return StreamingResponse(
+        timed_stream(stream_export(_export_batches(table, db, period), EXPORT_SCHEMAS[table], report_type), report_type),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+def _job_response(job: ReportJob) -> dict:
+    response = job.to_dict()
+    if job.status == "done":
+        response["download_url"] = f"{router.prefix}/jobs/{job.id}/download"
+    return response
+
+
+@router.post("/jobs", status_code=202, response_model=ReportJobResponse)
+def create_report_job(job_request: ReportJobCreate, db: Session = Depends(get_read_db)):
+    """
+    Queue an Excel or PDF report for background rendering.
+
+    Identical requests against the same data version return the same job.
+    """
+    _check_report_type(job_request.report_type)
+    period = analytics_period(job_request.start, job_request.end)
+    return _job_response(_submit_job(job_request.report_type, db, period))
+
+
+@router.get("/jobs/{job_id}", response_model=ReportJobResponse)
+def get_report_job(job_id: str):
+    job = report_jobs.find(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return _job_response(job)
+
+
+@router.get("/jobs/{job_id}/download")
+def download_report_job(job_id: str):
+    job = report_jobs.find(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail={"error": f"Failed to generate report: {job.error}"})
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail="Report is not ready yet")
+    return FileResponse(job.path, media_type=job.media_type, filename=job.filename)
+
+
 @router.get("/{report_type}")
-def generate_report(report_type: str, db: Session = Depends(get_db)):
+async def generate_report(
+    report_type: str,
+    period: Period = Depends(analytics_period),
+    table: str = Query("employee_roi"),
+    db: Session = Depends(get_read_db),
+):
     """
-    Generate and download analytics reports in Excel or PDF format.
+    Generate and download analytics reports in Excel or PDF format, or export
+    one table as Parquet or an Arrow IPC stream.
+    
+    Excel is streamed directly; PDF is rendered through the report job pool
+    and awaited, so the request threadpool stays free while it renders.
+    Parquet and Arrow stream ``table`` (an analytics result set or the raw
+    timesheets) as columnar record batches; they require pyarrow.
     
     Args:
-        report_type: Either 'excel' or 'pdf'
+        report_type: 'excel', 'pdf', 'parquet' or 'arrow'
+        period: Optional start/end work dates (query parameters)
+        table: Table to export for parquet/arrow (see EXPORT_SCHEMAS)
         db: Database session
     
     Returns:
         Response: File download with appropriate MIME type
     """
-    if report_type not in ['excel', 'pdf']:
-        raise HTTPException(
-            status_code=400, 
-            detail={"error": "Invalid report type. Use 'excel' or 'pdf'."}
-        )
+    _check_report_type(report_type, exports=True)
+    if report_type in EXPORT_FORMATS:
+        if table not in EXPORT_SCHEMAS:
+            raise HTTPException(
+                status_code=400,
+                detail={"error": f"Invalid table. Use one of: {', '.join(EXPORT_SCHEMAS)}."}
+            )
+        if not PYARROW_AVAILABLE:
+            raise HTTPException(status_code=400, detail={"error": f"{report_type} export requires pyarrow"})
     
     try:
-        # Gather all analytics data
-        analytics_data = {
-            'employee_roi': employee_roi(db),
-            'project_profit': project_profit(db),
-            'department_summary': department_summary(db),
-            'overall': overall(db)
-        }
-        
+        if report_type in EXPORT_FORMATS:
+            if table == "timesheets":
+                # streamed straight from a server-side cursor
+                return _export_response(report_type, table, db, period)
+            return await run_in_threadpool(_export_response, report_type, table, db, period)
+
         if report_type == 'excel':
-            # Generate Excel report
-            file_content = generate_excel_report(analytics_data)
+            # Gather all analytics data from one consistent snapshot
+            snapshot = await run_in_threadpool(current_snapshot, db, None, period)
+            # Stream the Excel report row by row as it is written
             filename = f"analytics_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-            media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            
-        else:  # pdf
-            # Generate PDF report
-            file_content = generate_pdf_report(analytics_data)
-            filename = f"analytics_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-            media_type = "application/pdf"
+            return StreamingResponse(
+                timed_stream(stream_excel_report({
+                    'employee_roi': snapshot.employee_roi,
+                    'project_profit': snapshot.project_profit,
+                    'department_summary': snapshot.department_summary,
+                    'overall': snapshot.overall,
+                }), 'excel'),
+                media_type=REPORT_FORMATS['excel'][1],
+                headers={"Content-Disposition": f"attachment; filename={filename}"}
+            )
         
-        return Response(
-            content=file_content,
-            media_type=media_type,
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
+        # pdf: thin wrapper over the job queue
+        job = await run_in_threadpool(_submit_job, report_type, db, period)
+        # also covers a job another request is still submitting
+        await asyncio.wrap_future(job.completed)
+        if job.error is not None:
+            raise RuntimeError(job.error)
+        return FileResponse(job.path, media_type=job.media_type, filename=job.filename)
         
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail={"error": f"Failed to generate report: {str(e)}"}
-        )
\ No newline at end of file
+        )
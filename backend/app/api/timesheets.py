@@ -1,8 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.database import get_db
+from app.db.database import get_async_db, get_db
+from app.models.employee import Employee
 from app.models.timesheet import Timesheet
-from app.schemas.timesheet_schema import TimesheetCreate, TimesheetResponse
+from app.schemas.batch_schema import BatchResponse
+from app.schemas.timesheet_schema import TimesheetBatch, TimesheetCreate, TimesheetResponse
+from app.utils.batch import apply_batch
+from app.utils.cache import bump_data_version
+from app.utils.pagination import MAX_PAGE_SIZE, keyset_page, ndjson_response, wants_ndjson
+from app.utils.rollups import RollupChanges, apply_rollup_changes
 
 router = APIRouter(prefix="/timesheets", tags=["Timesheets"])
 
@@ -10,17 +18,60 @@ router = APIRouter(prefix="/timesheets", tags=["Timesheets"])
 def create_timesheet(entry: TimesheetCreate, db: Session = Depends(get_db)):
     db_entry = Timesheet(**entry.dict())
     db.add(db_entry)
+    changes = RollupChanges()
+    changes.add_timesheet(db_entry.employee_id, db_entry.project_id, db_entry.hours_worked)
+    apply_rollup_changes(db, changes)
+    bump_data_version(db, "timesheets")
     db.commit()
     db.refresh(db_entry)
     return db_entry
 
+@router.post("/batch", response_model=BatchResponse)
+def batch_timesheets(batch: TimesheetBatch, db: Session = Depends(get_db)):
+    """
+    Apply many create/update/delete operations in one transaction.
+
+    Returns a status per operation (created ids included) without re-reading rows.
+    """
+    try:
+        result = apply_batch(db, "timesheets", batch.operations)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error applying batch: {str(e)}")
+    return result
+
 @router.get("/", response_model=list[TimesheetResponse])
-def get_all_timesheets(db: Session = Depends(get_db)):
-    return db.query(Timesheet).all()
+async def get_all_timesheets(
+    request: Request,
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: int | None = None,
+    employee_id: int | None = None,
+    project_id: int | None = None,
+    department: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    List timesheets ordered by id, one keyset page at a time (``after`` = last id seen).
+
+    With ``Accept: application/x-ndjson`` all matching rows are streamed instead.
+    """
+    stmt = select(Timesheet)
+    if employee_id is not None:
+        stmt = stmt.where(Timesheet.employee_id == employee_id)
+    if project_id is not None:
+        stmt = stmt.where(Timesheet.project_id == project_id)
+    if department is not None:
+        stmt = stmt.join(Employee, Employee.id == Timesheet.employee_id).where(Employee.department == department)
+    if wants_ndjson(request):
+        columns = [Timesheet.__table__.c[field] for field in TimesheetResponse.__fields__]
+        return ndjson_response(stmt.with_only_columns(*columns), Timesheet.id, limit, after)
+    return await keyset_page(db, stmt, Timesheet.id, request, response, limit, after)
 
 @router.get("/{timesheet_id}", response_model=TimesheetResponse)
-def get_timesheet(timesheet_id: int, db: Session = Depends(get_db)):
-    ts = db.query(Timesheet).filter(Timesheet.id == timesheet_id).first()
+async def get_timesheet(timesheet_id: int, db: AsyncSession = Depends(get_async_db)):
+    ts = await db.get(Timesheet, timesheet_id)
     if not ts:
         raise HTTPException(status_code=404, detail="Timesheet not found")
     return ts
@@ -30,8 +81,13 @@ def update_timesheet(timesheet_id: int, updated: TimesheetCreate, db: Session =
     ts = db.query(Timesheet).filter(Timesheet.id == timesheet_id).first()
     if not ts:
         raise HTTPException(status_code=404, detail="Timesheet not found")
+    changes = RollupChanges()
+    changes.remove_timesheet(ts.employee_id, ts.project_id, ts.hours_worked)
     for key, value in updated.dict().items():
         setattr(ts, key, value)
+    changes.add_timesheet(ts.employee_id, ts.project_id, ts.hours_worked)
+    apply_rollup_changes(db, changes)
+    bump_data_version(db, "timesheets")
     db.commit()
     db.refresh(ts)
     return ts
@@ -41,6 +97,10 @@ def delete_timesheet(timesheet_id: int, db: Session = Depends(get_db)):
     ts = db.query(Timesheet).filter(Timesheet.id == timesheet_id).first()
     if not ts:
         raise HTTPException(status_code=404, detail="Timesheet not found")
+    changes = RollupChanges()
+    changes.remove_timesheet(ts.employee_id, ts.project_id, ts.hours_worked)
     db.delete(ts)
+    apply_rollup_changes(db, changes)
+    bump_data_version(db, "timesheets")
     db.commit()
     return {"status": "deleted", "timesheet_id": timesheet_id}
@@ -1,61 +1,155 @@
-from fastapi import APIRouter, UploadFile, HTTPException, Depends
+import os
+import time
+import zipfile
+from typing import Optional
+
+import anyio
+from fastapi import APIRouter, UploadFile, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
 from app.db.database import get_db
+from app.utils.arrow_io import PYARROW_AVAILABLE, read_arrow_file
+from app.utils.bundle import load_bundle
 from app.utils.csv_loader import read_csv_file
-from app.models.employee import Employee
-from app.models.project import Project
-from app.models.timesheet import Timesheet
+from app.utils.cache import bump_data_version
+from app.utils.history import history_recorder
+from app.utils.ingest import (
+    INGEST_TABLES, bulk_upsert, file_fingerprint, previous_upload, skipped_upload, store_fingerprint,
+)
+from app.utils.metrics import record_upload
+from app.utils.rollups import RollupChanges, apply_rollup_changes
 
 router = APIRouter(prefix="/upload", tags=["Upload CSVs"])
 
+# Uploads are parsed and written on worker threads; cap how many run at once so
+# a burst of uploads cannot take every thread from the rest of the API.
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "2"))
+_upload_limiter = anyio.CapacityLimiter(UPLOAD_CONCURRENCY)
+
+# format -> (file name extensions, label used in error messages)
+UPLOAD_FORMATS = {
+    "csv": ((".csv",), "CSV"),
+    "parquet": ((".parquet", ".pq"), "Parquet"),
+    "arrow": ((".arrow", ".arrows", ".feather", ".ipc"), "Arrow"),
+}
+
+
+def upload_format(filename: Optional[str], requested: Optional[str] = None) -> str:
+    """The explicit ``?format=``, else the one implied by the file extension, else CSV."""
+    if requested is not None:
+        if requested not in UPLOAD_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Invalid format. Use one of: {', '.join(UPLOAD_FORMATS)}")
+        return requested
+    name = (filename or "").lower()
+    for fmt, (extensions, _) in UPLOAD_FORMATS.items():
+        if name.endswith(extensions):
+            return fmt
+    return "csv"
+
+
+def read_upload(file: UploadFile, data_type: str, fmt: str = "csv"):
+    """Typed DataFrame chunks of an uploaded file in any of the UPLOAD_FORMATS."""
+    if fmt == "csv":
+        return read_csv_file(file, data_type)
+    return read_arrow_file(file, data_type, fmt)
+
+
+def _ingest(db: Session, data_type: str, file: UploadFile, fmt: str = "csv", delete_missing: bool = False) -> dict:
+    """Diff, upsert, refresh rollups and commit; runs on a worker thread."""
+    started = time.perf_counter()
+    file_hash = file_fingerprint(file.file)
+    try:
+        previous = previous_upload(db, data_type, file_hash, delete_missing)
+        if previous is not None:
+            # same file as the last upload and the table is untouched since: nothing to do
+            db.rollback()
+            return skipped_upload(previous, time.perf_counter() - started)
+        chunks = read_upload(file, data_type, fmt)
+        changes = RollupChanges()
+        stats = bulk_upsert(db, data_type, chunks, changes, delete_missing)
+        if stats["rows_inserted"] or stats["rows_updated"] or stats["rows_deleted"]:
+            apply_rollup_changes(db, changes)
+            bump_data_version(db, data_type)
+        store_fingerprint(db, data_type, file_hash, stats["rows_processed"], delete_missing)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    record_upload(data_type, stats["rows_processed"], time.perf_counter() - started)
+    return {"skipped": False, "file_hash": file_hash, **stats}
+
+
+def _ingest_bundle(db: Session, file: UploadFile) -> dict:
+    """Load the archive straight from the spooled upload and commit; runs on a worker thread."""
+    started = time.perf_counter()
+    file.file.seek(0)
+    try:
+        tables = load_bundle(db, file.file)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return {"tables": tables, "elapsed_seconds": round(time.perf_counter() - started, 4)}
+
+
+@router.post("/bundle")
+async def upload_bundle(file: UploadFile, db: Session = Depends(get_db)):
+    """
+    Upload a zip of employees.csv, projects.csv and timesheets.csv as one refresh.
+
+    The CSVs are streamed out of the archive and parsed on a background thread
+    while earlier chunks are written. They are loaded in dependency order
+    (employees, projects, timesheets) in a single transaction, so the
+    analytics never see a half-loaded bundle. Ids referenced by the
+    timesheets are checked in bulk; an unknown id rejects the whole bundle.
+    Any subset of the three files may be sent.
+    """
+    try:
+        result = await anyio.to_thread.run_sync(_ingest_bundle, db, file, limiter=_upload_limiter)
+    except (ValueError, zipfile.BadZipFile) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid bundle: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing bundle: {str(e)}")
+
+    if not all(table["skipped"] for table in result["tables"].values()):
+        history_recorder.notify()
+    return {"status": "success", **result}
+
+
 @router.post("/{data_type}")
-async def upload_csv(data_type: str, file: UploadFile, db: Session = Depends(get_db)):
+async def upload_csv(
+    data_type: str,
+    file: UploadFile,
+    fmt: Optional[str] = Query(None, alias="format"),
+    delete_missing: bool = False,
+    db: Session = Depends(get_db),
+):
     """
-    Upload CSV data into employees, projects, or timesheets tables.
+    Upload CSV, Parquet or Arrow IPC data into employees, projects, or timesheets tables.
+
+    The format comes from ``?format=`` or the file extension (.parquet/.pq,
+    .arrow/.arrows/.feather/.ipc) and defaults to CSV. Parquet and Arrow
+    files are read as typed columns (pyarrow required), CSVs are parsed.
+    The file is streamed in typed chunks and each chunk is diffed against
+    the stored rows by id; only new and changed rows are bulk-upserted
+    (INSERT ... ON CONFLICT DO UPDATE) and ``delete_missing`` also removes
+    rows absent from the file. A file identical to the table's previous
+    upload, with no writes since, is skipped without being parsed. The
+    whole upload, including the analytics rollup refresh, is one
+    transaction. The work runs off the event loop, so other requests are
+    served while a large file loads.
     """
-    df = read_csv_file(file)
-    inserted_rows = 0
+    if data_type not in INGEST_TABLES:
+        raise HTTPException(status_code=400, detail="Invalid data_type parameter")
+    fmt = upload_format(file.filename, fmt)
+    if fmt != "csv" and not PYARROW_AVAILABLE:
+        raise HTTPException(status_code=400, detail=f"{UPLOAD_FORMATS[fmt][1]} uploads require pyarrow")
 
     try:
-        if data_type == "employees":
-            for _, row in df.iterrows():
-                employee = Employee(
-                    id=int(row["id"]),
-                    name=row["name"],
-                    department=row["department"],
-                    hourly_rate=float(row["hourly_rate"]),
-                )
-                db.merge(employee)  # merge avoids duplicate insert
-            db.commit()
-            inserted_rows = len(df)
-
-        elif data_type == "projects":
-            for _, row in df.iterrows():
-                project = Project(
-                    id=int(row["id"]),
-                    name=row["name"],
-                    revenue=float(row["revenue"]),
-                )
-                db.merge(project)
-            db.commit()
-            inserted_rows = len(df)
-
-        elif data_type == "timesheets":
-            for _, row in df.iterrows():
-                timesheet = Timesheet(
-                    id=int(row["id"]),
-                    employee_id=int(row["employee_id"]),
-                    project_id=int(row["project_id"]),
-                    hours_worked=float(row["hours_worked"]),
-                )
-                db.merge(timesheet)
-            db.commit()
-            inserted_rows = len(df)
-
-        else:
-            raise HTTPException(status_code=400, detail="Invalid data_type parameter")
+        stats = await anyio.to_thread.run_sync(_ingest, db, data_type, file, fmt, delete_missing, limiter=_upload_limiter)
 
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing CSV: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing {UPLOAD_FORMATS[fmt][1]}: {str(e)}")
 
-    return {"status": "success", "rows_inserted": inserted_rows, "table": data_type}
+    if not stats["skipped"]:
+        history_recorder.notify()
+    return {"status": "success", "table": data_type, "format": fmt, **stats}
@@ -1,16 +1,148 @@
-from sqlalchemy import create_engine
+import os
+import threading
+from typing import Callable, List, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-# SQLite for MVP; switch to PostgreSQL later:
-SQLALCHEMY_DATABASE_URL = "sqlite:///./employee_dashboard.db"
+# SQLite by default; point DATABASE_URL at PostgreSQL for production
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./employee_dashboard.db")
+
+# SQLite connection tuning (applied to every new connection)
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+
+# Pool sizing for client/server databases (SQLite keeps SQLAlchemy's defaults)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", str(DB_POOL_SIZE)))
+
+# asyncio drivers used for the read-only pool
+_ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def async_url(url: str) -> str:
+    """The same database addressed through an asyncio driver."""
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No asyncio driver configured for '{parsed.get_backend_name()}'")
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def _sqlite_pragmas(read_only: bool):
+    # WAL lets readers run while the upload writer holds its transaction;
+    # journal_mode is stored in the file, so only the writer pool sets it.
+    pragmas = [] if read_only else ["journal_mode=WAL"]
+    pragmas += [
+        f"synchronous={SQLITE_SYNCHRONOUS}",
+        f"busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+        f"cache_size={-SQLITE_CACHE_SIZE_KB}",
+        f"mmap_size={SQLITE_MMAP_SIZE}",
+        "temp_store=MEMORY",
+    ]
+    if read_only:
+        pragmas.append("query_only=ON")
+    return pragmas
+
+
+def _install_connect_hooks(sync_engine: Engine, read_only: bool) -> None:
+    backend = sync_engine.dialect.name
+    if backend == "sqlite":
+        statements = [f"PRAGMA {pragma}" for pragma in _sqlite_pragmas(read_only)]
+    elif backend == "postgresql" and read_only:
+        statements = ["SET SESSION CHARACTERISTICS AS TRANSACTION READ ONLY"]
+    else:
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def _configure(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.close()
+
+
+def _engine_options(url: str, read_only: bool) -> dict:
+    if make_url(url).get_backend_name() == "sqlite":
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": DB_READ_POOL_SIZE if read_only else DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+
+def create_db_engine(url: str = SQLALCHEMY_DATABASE_URL, read_only: bool = False) -> Engine:
+    """Build a tuned engine for ``url``; ``read_only`` connections refuse writes."""
+    db_engine = create_engine(url, **_engine_options(url, read_only))
+    _install_connect_hooks(db_engine, read_only)
+    return db_engine
+
+
+def create_async_db_engine(url: str, read_only: bool = True) -> AsyncEngine:
+    """Async counterpart of :func:`create_db_engine`."""
+    db_engine = create_async_engine(url, **_engine_options(url, read_only))
+    _install_connect_hooks(db_engine.sync_engine, read_only)
+    return db_engine
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+
+# Explicit URL for the async read pool; derived from DATABASE_URL when unset
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Separate read-only pools: analytics and list reads never queue behind the writer
+read_engine = create_db_engine(read_only=True)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# The async read pool is created on first use, so processes that never read
+# asynchronously (migrations, CLI tools, report workers) don't need its driver.
+# Callables in ASYNC_ENGINE_HOOKS get the new engine's sync_engine (e.g. metrics).
+ASYNC_ENGINE_HOOKS: List[Callable[[Engine], None]] = []
+_async_engine: Optional[AsyncEngine] = None
+_async_sessions: Optional[async_sessionmaker] = None
+_async_lock = threading.Lock()
+
+
+def get_async_engine() -> AsyncEngine:
+    """The async read-only engine of this process, created on first use."""
+    global _async_engine, _async_sessions
+    with _async_lock:
+        if _async_engine is None:
+            url = ASYNC_DATABASE_URL or async_url(SQLALCHEMY_DATABASE_URL)
+            try:
+                db_engine = create_async_db_engine(url, read_only=True)
+            except ImportError as e:
+                raise RuntimeError(
+                    f"Async reads need the '{make_url(url).get_driver_name()}' driver, which is not installed "
+                    f"({e}). Install it (e.g. pip install asyncpg for PostgreSQL) or set ASYNC_DATABASE_URL."
+                ) from e
+            for hook in ASYNC_ENGINE_HOOKS:
+                hook(db_engine.sync_engine)
+            _async_sessions = async_sessionmaker(db_engine, autoflush=False, expire_on_commit=False)
+            _async_engine = db_engine
+        return _async_engine
+
+
+def async_session() -> AsyncSession:
+    """A new session on the async read-only engine."""
+    if _async_sessions is None:
+        get_async_engine()
+    return _async_sessions()
+
 # Dependency for DB sessions
 def get_db():
     db = SessionLocal()
@@ -18,3 +150,25 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependency for read-only DB sessions (report rendering and other sync readers)
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Dependency for async read-only DB sessions; queries run without blocking the event loop
+async def get_async_db():
+    async with async_session() as db:
+        yield db
+
+# INSERT construct with ON CONFLICT support for the session's dialect
+def dialect_insert(db, table):
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(table)
+    if dialect == "postgresql":
+        return postgresql.insert(table)
+    raise ValueError(f"Upserts are not supported for the '{dialect}' dialect")
@@ -0,0 +1,55 @@
+"""
+Schema setup and migrations (Alembic, scripts in backend/migrations).
+
+``prepare_database`` creates missing tables, applies pending migrations and
+builds the analytics rollups of an existing database once. Run it as a
+deploy step with ``python -m app.db.migrate`` and start the API with
+``DB_AUTO_MIGRATE=0``; by default the API still runs it on startup.
+"""
+import sys
+from pathlib import Path
+
+from sqlalchemy.engine import Engine
+
+from app.db.database import engine as default_engine
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+
+def alembic_config():
+    from alembic.config import Config
+
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    return config
+
+
+def upgrade_database(engine: Engine = default_engine, revision: str = "head") -> None:
+    """Apply pending migrations in one transaction."""
+    from alembic import command
+
+    config = alembic_config()
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
+
+
+def prepare_database(engine: Engine = default_engine, revision: str = "head") -> None:
+    """Create tables, bring older databases up to ``revision`` and build missing rollups."""
+    from sqlalchemy.orm import Session
+
+    from app.db.database import Base
+    from app.models import (  # noqa: F401 (register tables)
+        employee, project, timesheet, rollup, data_version, upload_fingerprint, analytics_history,
+    )
+    from app.utils.rollups import ensure_rollups
+
+    Base.metadata.create_all(bind=engine)
+    upgrade_database(engine, revision)
+    with Session(engine, autoflush=False) as db:
+        ensure_rollups(db)
+
+
+if __name__ == "__main__":
+    prepare_database(revision=sys.argv[1] if len(sys.argv) > 1 else "head")
+    print("Database is up to date.")
@@ -1,12 +1,38 @@
-from fastapi import FastAPI
-from app.db.database import Base, engine
-from app.models import employee, project, timesheet
-from app.api import upload, employees, projects, timesheets, analytics, reports
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from fastapi.concurrency import run_in_threadpool
+from app.db.database import ASYNC_ENGINE_HOOKS, engine, read_engine
+from app.db.migrate import prepare_database
+from app.models import employee, project, timesheet, rollup, data_version, upload_fingerprint, analytics_history
+from app.api import upload, employees, projects, timesheets, analytics, history, reports
+from app.utils.metrics import PROMETHEUS_CONTENT_TYPE, MetricsMiddleware, instrument_engine, registry
+from app.utils.history import history_recorder
+from app.utils.report_jobs import report_jobs
 
-app = FastAPI(title="Employee Productivity & Cost Dashboard API")
+# Create tables, run migrations and build rollups when a worker starts. Set to 0
+# when `python -m app.db.migrate` runs as a deploy step, so workers start faster.
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "1") != "0"
 
-# create DB tables
-Base.metadata.create_all(bind=engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if DB_AUTO_MIGRATE:
+        await run_in_threadpool(prepare_database, engine)
+    history_recorder.start()
+    yield
+    await history_recorder.stop()
+    report_jobs.shutdown()
+
+
+app = FastAPI(title="Employee Productivity & Cost Dashboard API", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+
+# count and time every statement, attributed to the request that ran it
+for db_engine in (engine, read_engine):
+    instrument_engine(db_engine)
+# the async read pool is created on first use
+ASYNC_ENGINE_HOOKS.append(instrument_engine)
 
 # Routers
 app.include_router(upload.router)
@@ -14,8 +40,15 @@ app.include_router(employees.router)
 app.include_router(projects.router)
 app.include_router(timesheets.router)
 app.include_router(analytics.router)
+app.include_router(history.router)
 app.include_router(reports.router)
 
 @app.get("/health")
 def health_check():
     return {"status": "ok", "message": "Backend running successfully!"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus text exposition of this worker's metrics."""
+    return Response(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
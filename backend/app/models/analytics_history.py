@@ -0,0 +1,37 @@
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String
+from app.db.database import Base
+
+# Written by app.utils.history; one snapshot per recorded data version.
+
+class AnalyticsHistory(Base):
+    """A recorded analytics snapshot: when it was taken, of which data version, and the overall totals."""
+    __tablename__ = "analytics_history"
+
+    id = Column(Integer, primary_key=True)
+    taken_at = Column(DateTime, nullable=False, index=True)
+    data_version = Column(String, nullable=False, unique=True)
+    total_hours = Column(Float, nullable=False, default=0.0)
+    total_cost = Column(Float, nullable=False, default=0.0)
+    total_revenue = Column(Float, nullable=False, default=0.0)
+
+
+class AnalyticsHistoryRow(Base):
+    """
+    Totals of one employee, project or department in a snapshot.
+
+    The primary key leads with (kind, key), so the series of one entity is a
+    single index range scan in snapshot (= time) order.
+    """
+    __tablename__ = "analytics_history_rows"
+
+    kind = Column(String, primary_key=True)  # "employee" | "project" | "department"
+    key = Column(String, primary_key=True)  # id, or department name ("" for none)
+    snapshot_id = Column(Integer, ForeignKey("analytics_history.id"), primary_key=True)
+    total_hours = Column(Float, nullable=False, default=0.0)
+    total_cost = Column(Float, nullable=False, default=0.0)
+    total_revenue = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        # retention deletes rows by snapshot
+        Index("ix_analytics_history_rows_snapshot", "snapshot_id"),
+    )
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, String
+from app.db.database import Base
+
+class DataVersion(Base):
+    """Write counter per source table; shared by every worker through the database."""
+    __tablename__ = "data_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import Column, Float, Index, Integer, String
 from app.db.database import Base
 
 class Employee(Base):
@@ -8,3 +8,8 @@ class Employee(Base):
     name = Column(String, nullable=False)
     department = Column(String, nullable=True)
     hourly_rate = Column(Float, nullable=False)
+
+    __table_args__ = (
+        # department filters and per-department rollup refreshes
+        Index("ix_employees_department_rate", "department", "id", "hourly_rate"),
+    )
@@ -0,0 +1,46 @@
+from sqlalchemy import Column, Integer, String, Float
+from app.db.database import Base
+
+# Derived tables kept in sync by app.utils.rollups; never written by the API directly.
+
+class EmployeeProjectRollup(Base):
+    """Timesheet totals at the (employee, project) grain."""
+    __tablename__ = "employee_project_rollups"
+
+    employee_id = Column(Integer, primary_key=True)
+    project_id = Column(Integer, primary_key=True, index=True)
+    entries = Column(Integer, nullable=False, default=0)
+    total_hours = Column(Float, nullable=False, default=0.0)
+    total_cost = Column(Float, nullable=False, default=0.0)
+
+
+class ProjectRollup(Base):
+    """Per-project totals; allocation_hours also counts hours of unknown employees."""
+    __tablename__ = "project_rollups"
+
+    project_id = Column(Integer, primary_key=True)
+    entries = Column(Integer, nullable=False, default=0)
+    allocation_hours = Column(Float, nullable=False, default=0.0)
+    total_hours = Column(Float, nullable=False, default=0.0)
+    total_cost = Column(Float, nullable=False, default=0.0)
+
+
+class EmployeeRollup(Base):
+    """Per-employee totals including the revenue share allocated from each project."""
+    __tablename__ = "employee_rollups"
+
+    employee_id = Column(Integer, primary_key=True)
+    total_hours = Column(Float, nullable=False, default=0.0)
+    total_cost = Column(Float, nullable=False, default=0.0)
+    total_revenue = Column(Float, nullable=False, default=0.0)
+
+
+class DepartmentRollup(Base):
+    """Per-department sums of the employee rollups."""
+    __tablename__ = "department_rollups"
+
+    id = Column(Integer, primary_key=True)
+    department = Column(String, nullable=True, index=True)
+    total_hours = Column(Float, nullable=False, default=0.0)
+    total_cost = Column(Float, nullable=False, default=0.0)
+    total_revenue = Column(Float, nullable=False, default=0.0)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey
+from sqlalchemy import Column, Date, Index, Integer, Float, ForeignKey
 from app.db.database import Base
 
 class Timesheet(Base):
@@ -8,3 +8,15 @@ class Timesheet(Base):
     employee_id = Column(Integer, ForeignKey("employees.id"))
     project_id = Column(Integer, ForeignKey("projects.id"))
     hours_worked = Column(Float, nullable=False)
+    work_date = Column(Date, nullable=True)
+
+    # Covering indexes for the analytics aggregations: each one holds every
+    # column its queries read, so SQLite never visits the table rows.
+    __table_args__ = (
+        # per-employee lookups and (employee, project) grouping
+        Index("ix_timesheets_employee_project_hours", "employee_id", "project_id", "hours_worked"),
+        # per-project hours for revenue allocation, per-project joins
+        Index("ix_timesheets_project_employee_hours", "project_id", "employee_id", "hours_worked"),
+        # period filters: a month's analytics only touches that month's rows
+        Index("ix_timesheets_period_covering", "work_date", "project_id", "employee_id", "hours_worked"),
+    )
@@ -0,0 +1,15 @@
+from sqlalchemy import Boolean, Column, DateTime, Integer, String
+from app.db.database import Base
+
+class UploadFingerprint(Base):
+    """Hash of the last file uploaded per table, used to skip re-sends of an unchanged file."""
+    __tablename__ = "upload_fingerprints"
+
+    data_type = Column(String, primary_key=True)
+    file_hash = Column(String, nullable=False)
+    # data_versions.version of the table right after that upload; any later write changes it
+    table_version = Column(Integer, nullable=False)
+    # the upload also removed rows missing from the file
+    pruned = Column(Boolean, nullable=False, default=False)
+    rows = Column(Integer, nullable=False, default=0)
+    uploaded_at = Column(DateTime, nullable=False)
@@ -28,3 +28,28 @@ class DepartmentSummary(BaseModel):
     total_revenue: float
     roi: float | None = None
 
+
+class EmployeeProjectShare(BaseModel):
+    """One project's part of an employee's hours, cost and allocated revenue."""
+    project_id: int
+    project_name: str
+    total_hours: float
+    total_cost: float
+    total_revenue: float
+    roi: float | None = None
+
+
+class EmployeeROIDetail(EmployeeROI):
+    projects: list[EmployeeProjectShare] = []
+
+
+class ProjectProfitDetail(ProjectProfit):
+    # each employee's hours, cost and revenue share on this project
+    employees: list[EmployeeROI] = []
+
+
+class AnalyticsSnapshot(BaseModel):
+    employee_roi: list[EmployeeROI]
+    project_profit: list[ProjectProfit]
+    department_summary: list[DepartmentSummary]
+    overall: dict
@@ -0,0 +1,22 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+# Operations accepted in one batch request
+MAX_BATCH_SIZE = 10_000
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    op: str
+    id: Optional[int] = None
+    status: str  # created, updated, deleted, not_found or invalid
+    detail: Optional[str] = None
+
+
+class BatchResponse(BaseModel):
+    status: str
+    table: str
+    applied: int
+    failed: int
+    results: list[BatchItemResult]
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from app.schemas.batch_schema import MAX_BATCH_SIZE
 
 class EmployeeBase(BaseModel):
     name: str
@@ -13,3 +15,11 @@ class EmployeeResponse(EmployeeBase):
 
     class Config:
         orm_mode = True
+
+class EmployeeBatchOperation(BaseModel):
+    op: str  # create, update or delete
+    id: int | None = None
+    data: EmployeeCreate | None = None
+
+class EmployeeBatch(BaseModel):
+    operations: list[EmployeeBatchOperation] = Field(..., max_length=MAX_BATCH_SIZE)
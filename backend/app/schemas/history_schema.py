@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class HistoryPoint(BaseModel):
+    taken_at: datetime
+    data_version: str
+    total_hours: float
+    total_cost: float
+    total_revenue: float
+    roi: float | None = None
+
+
+class ProjectHistoryPoint(BaseModel):
+    taken_at: datetime
+    data_version: str
+    total_hours: float
+    total_cost: float
+    total_revenue: float
+    profit: float
+    profit_margin: float | None = None
+
+
+class RecordedSnapshotResponse(BaseModel):
+    snapshot_id: int
+    data_version: str
+    taken_at: datetime
+    created: bool
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from app.schemas.batch_schema import MAX_BATCH_SIZE
 
 class ProjectBase(BaseModel):
     name: str
@@ -12,3 +14,11 @@ class ProjectResponse(ProjectBase):
 
     class Config:
         orm_mode = True
+
+class ProjectBatchOperation(BaseModel):
+    op: str  # create, update or delete
+    id: int | None = None
+    data: ProjectCreate | None = None
+
+class ProjectBatch(BaseModel):
+    operations: list[ProjectBatchOperation] = Field(..., max_length=MAX_BATCH_SIZE)
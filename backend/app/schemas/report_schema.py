@@ -0,0 +1,23 @@
+from datetime import date
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class ReportJobCreate(BaseModel):
+    report_type: str
+    start: Optional[date] = None
+    end: Optional[date] = None
+
+
+class ReportJobResponse(BaseModel):
+    job_id: str
+    report_type: str
+    status: str
+    data_version: str
+    period: str | None = None
+    created_at: str | None = None
+    finished_at: str | None = None
+    expires_at: str | None = None
+    error: str | None = None
+    download_url: str | None = None
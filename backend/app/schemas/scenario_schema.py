@@ -0,0 +1,50 @@
+from datetime import date
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from app.schemas.analytics_schema import DepartmentSummary, EmployeeROI, ProjectProfit
+
+# Scenarios evaluated in one request
+MAX_SCENARIOS = 100
+
+
+class RateOverride(BaseModel):
+    """Scale (``factor``) or set (``hourly_rate``) the rates of one employee, a department, or everyone."""
+    employee_id: Optional[int] = None
+    department: Optional[str] = None
+    factor: Optional[float] = Field(None, ge=0)
+    hourly_rate: Optional[float] = Field(None, ge=0)
+
+
+class RevenueOverride(BaseModel):
+    """Scale (``factor``) or set (``revenue``) the revenue of one project, or of every project."""
+    project_id: Optional[int] = None
+    factor: Optional[float] = Field(None, ge=0)
+    revenue: Optional[float] = Field(None, ge=0)
+
+
+class Scenario(BaseModel):
+    name: Optional[str] = None
+    # applied in order, so factors compound
+    rates: list[RateOverride] = []
+    revenues: list[RevenueOverride] = []
+
+
+class ScenarioRequest(BaseModel):
+    scenarios: list[Scenario] = Field(..., min_length=1, max_length=MAX_SCENARIOS)
+    start: Optional[date] = None
+    end: Optional[date] = None
+
+
+class ScenarioResult(BaseModel):
+    name: Optional[str] = None
+    employee_roi: list[EmployeeROI]
+    project_profit: list[ProjectProfit]
+    department_summary: list[DepartmentSummary]
+    overall: dict
+
+
+class ScenarioResponse(BaseModel):
+    data_version: str
+    scenarios: list[ScenarioResult]
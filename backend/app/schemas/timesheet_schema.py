@@ -1,9 +1,15 @@
-from pydantic import BaseModel
+from datetime import date
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from app.schemas.batch_schema import MAX_BATCH_SIZE
 
 class TimesheetBase(BaseModel):
     employee_id: int
     project_id: int
     hours_worked: float
+    work_date: Optional[date] = None
 
 class TimesheetCreate(TimesheetBase):
     pass
@@ -13,3 +19,11 @@ class TimesheetResponse(TimesheetBase):
 
     class Config:
         orm_mode = True
+
+class TimesheetBatchOperation(BaseModel):
+    op: str  # create, update or delete
+    id: Optional[int] = None
+    data: Optional[TimesheetCreate] = None
+
+class TimesheetBatch(BaseModel):
+    operations: list[TimesheetBatchOperation] = Field(..., max_length=MAX_BATCH_SIZE)
@@ -0,0 +1,194 @@
+"""
+Parquet and Arrow IPC uploads and exports (optional: requires pyarrow).
+
+Uploads are read as record batches and every schema column is cast to its
+CSV_SCHEMAS type by Arrow, so values arrive already typed and nothing is parsed
+from text. The typed chunks then go through the same ``bulk_upsert`` path as
+CSV uploads.
+
+Exports stream one analytics result set, or the raw timesheets, as record
+batches: an Arrow IPC stream, or a Parquet file written one row group per batch.
+"""
+import importlib.util
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional
+
+from fastapi import UploadFile
+from sqlalchemy import select
+
+from app.db.database import ReadSessionLocal
+from app.models.timesheet import Timesheet
+from app.utils.csv_loader import CSV_SCHEMAS, DEFAULT_CHUNK_SIZE
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# pyarrow is only imported once a Parquet/Arrow upload or export is requested
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+# First bytes of an Arrow IPC *file* (Feather v2); anything else is read as an IPC stream
+_ARROW_FILE_MAGIC = b"ARROW1"
+
+# format -> (file extension, media type) for /report/{parquet,arrow}
+EXPORT_FORMATS = {
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+    "arrow": ("arrows", "application/vnd.apache.arrow.stream"),
+}
+
+# Column types of each exportable table, in the CSV_SCHEMAS vocabulary
+EXPORT_SCHEMAS = {
+    "employee_roi": {
+        "employee_id": "int64",
+        "employee_name": "string",
+        "department": "string",
+        "total_hours": "float64",
+        "total_cost": "float64",
+        "total_revenue": "float64",
+        "roi": "float64",
+    },
+    "project_profit": {
+        "project_id": "int64",
+        "project_name": "string",
+        "total_hours": "float64",
+        "total_cost": "float64",
+        "total_revenue": "float64",
+        "profit": "float64",
+        "profit_margin": "float64",
+    },
+    "department_summary": {
+        "department": "string",
+        "total_hours": "float64",
+        "total_cost": "float64",
+        "total_revenue": "float64",
+        "roi": "float64",
+    },
+    "overall": {
+        "total_cost": "float64",
+        "total_revenue": "float64",
+        "roi": "float64",
+    },
+    "timesheets": CSV_SCHEMAS["timesheets"],
+}
+
+# Rows per exported record batch / Parquet row group
+EXPORT_BATCH_SIZE = 50_000
+
+
+def require_pyarrow(what: str) -> None:
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError(f"{what} requires pyarrow (pip install pyarrow)")
+
+
+def arrow_schema(columns: dict):
+    import pyarrow as pa
+
+    types = {"int64": pa.int64(), "float64": pa.float64(), "string": pa.string(), "date": pa.date32()}
+    return pa.schema([(name, types[dtype]) for name, dtype in columns.items()])
+
+
+def _upload_batches(file: UploadFile, fmt: str, columns: list, chunksize: int):
+    import pyarrow as pa
+
+    file.file.seek(0)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(file.file)
+        present = [name for name in columns if name in parquet.schema_arrow.names]
+        yield from parquet.iter_batches(batch_size=chunksize, columns=present)
+        return
+
+    is_file = file.file.read(len(_ARROW_FILE_MAGIC)) == _ARROW_FILE_MAGIC
+    file.file.seek(0)
+    if is_file:
+        reader = pa.ipc.open_file(file.file)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    else:
+        batches = pa.ipc.open_stream(file.file)
+    # IPC batches are sized by the writer; re-slice so chunks stay bounded
+    for batch in batches:
+        for offset in range(0, batch.num_rows, chunksize):
+            yield batch.slice(offset, chunksize)
+
+
+def read_arrow_file(
+    file: UploadFile, data_type: str, fmt: str, chunksize: int = DEFAULT_CHUNK_SIZE
+) -> Iterator["pd.DataFrame"]:
+    """
+    Stream an uploaded Parquet or Arrow IPC file as typed DataFrame chunks.
+
+    Only the schema columns are read. Each one is cast column-wise to its
+    target type (a lossy cast raises), so the chunks match what
+    ``read_csv_file`` yields and ``bulk_upsert`` converts them the same way.
+    """
+    require_pyarrow(f"{fmt.capitalize()} upload")
+    import pyarrow as pa
+
+    columns = CSV_SCHEMAS[data_type]
+    target = arrow_schema(columns)
+    for batch in _upload_batches(file, fmt, list(columns), chunksize):
+        if not batch.num_rows:
+            continue
+        present = [name for name in columns if name in batch.schema.names]
+        table = pa.table({name: batch.column(name).cast(target.field(name).type) for name in present})
+        # dates become datetime64 columns rather than Python objects
+        yield table.to_pandas(date_as_object=False)
+
+
+def _record_batch(rows: list, schema):
+    """Build a record batch column by column from rows (mappings or pydantic models)."""
+    import pyarrow as pa
+
+    records = [row if isinstance(row, Mapping) else vars(row) for row in rows]
+    return pa.record_batch([[record[name] for record in records] for name in schema.names], schema=schema)
+
+
+def stream_export(batches: Iterable, columns: dict, fmt: str) -> Iterator[bytes]:
+    """
+    Write record batches as an Arrow IPC stream or a Parquet file, yielding bytes as they are written.
+
+    ``batches`` yields lists of rows (dicts or pydantic models); an empty
+    result still produces a valid file carrying the schema.
+    """
+    import pyarrow as pa
+
+    from app.utils.report_generator import _ChunkSink
+
+    schema = arrow_schema(columns)
+    sink = _ChunkSink()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        writer = pq.ParquetWriter(sink, schema)
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    with writer:
+        for rows in batches:
+            if rows:
+                writer.write_batch(_record_batch(rows, schema))
+                yield sink.drain()
+    yield sink.drain()
+
+
+def export_rows(rows: list, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[list]:
+    """Split an in-memory result set into export batches."""
+    for offset in range(0, len(rows), batch_size):
+        yield rows[offset:offset + batch_size]
+
+
+def timesheet_batches(conditions: Optional[list] = None, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[list]:
+    """
+    Raw timesheet rows from a server-side cursor, one batch at a time.
+
+    Opens its own read session because the request's session is closed
+    before the body has finished streaming.
+    """
+    stmt = (
+        select(*(getattr(Timesheet, name) for name in EXPORT_SCHEMAS["timesheets"]))
+        .where(*(conditions or ()))
+        .order_by(Timesheet.id)
+        .execution_options(yield_per=batch_size)
+    )
+    with ReadSessionLocal() as db:
+        for partition in db.execute(stmt).mappings().partitions():
+            yield partition
@@ -0,0 +1,131 @@
+"""
+Batched create/update/delete for the CRUD tables.
+
+A batch is validated against the current rows in memory first, then written
+with one bulk statement per operation kind (DELETE ... IN, UPDATE by primary
+key, INSERT ... RETURNING) inside the caller's transaction. Items that cannot
+be applied (unknown op, missing id/data, row not found) are reported in the
+per-item results and skipped; the rest of the batch still goes through.
+"""
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.utils.cache import bump_data_version
+from app.utils.ingest import INGEST_TABLES
+from app.utils.rollups import RollupChanges, apply_rollup_changes
+
+BATCH_OPS = ("create", "update", "delete")
+
+# Keeps id lists under SQLite's bound-parameter limit
+_ID_BATCH = 500
+
+
+def _chunks(ids: List[int]):
+    for start in range(0, len(ids), _ID_BATCH):
+        yield ids[start:start + _ID_BATCH]
+
+
+def _current_rows(db: Session, model, ids: List[int]) -> Dict[int, dict]:
+    table = model.__table__
+    rows = {}
+    for chunk in _chunks(ids):
+        for row in db.execute(select(table).where(table.c.id.in_(chunk))).mappings():
+            rows[row["id"]] = dict(row)
+    return rows
+
+
+def _record(changes: RollupChanges, data_type: str, old: Optional[dict], new: Optional[dict]) -> None:
+    """Describe one row going from ``old`` to ``new`` (either may be None) to the rollups."""
+    if data_type == "timesheets":
+        if old is not None:
+            changes.remove_timesheet(old["employee_id"], old["project_id"], old["hours_worked"])
+        if new is not None:
+            changes.add_timesheet(new["employee_id"], new["project_id"], new["hours_worked"])
+    elif data_type == "employees":
+        row = new or old
+        changes.employee_changed(row["id"], *([old["department"]] if old else []))
+    else:
+        changes.project_changed((new or old)["id"])
+
+
+def _result(index: int, item, status: str, row_id: Optional[int] = None, detail: Optional[str] = None) -> dict:
+    return {"index": index, "op": item.op, "id": row_id if row_id is not None else item.id, "status": status, "detail": detail}
+
+
+def apply_batch(db: Session, data_type: str, operations: list) -> dict:
+    """
+    Apply ``operations`` (items with ``op``, ``id`` and ``data``) to the table
+    for ``data_type``, refresh the rollups and bump the data version.
+
+    Operations are resolved in order, so an update followed by a delete of the
+    same id deletes it and a delete followed by an update reports not_found.
+    The caller commits.
+    """
+    model = INGEST_TABLES[data_type]
+    results: List[Optional[dict]] = [None] * len(operations)
+
+    referenced = sorted({item.id for item in operations if item.op in ("update", "delete") and item.id is not None})
+    original = _current_rows(db, model, referenced)
+    state: Dict[int, Optional[dict]] = dict(original)
+    touched = set()
+    creates = []
+
+    for index, item in enumerate(operations):
+        if item.op not in BATCH_OPS:
+            results[index] = _result(index, item, "invalid", detail=f"op must be one of {', '.join(BATCH_OPS)}")
+        elif item.op == "create":
+            if item.data is None:
+                results[index] = _result(index, item, "invalid", detail="data is required")
+            else:
+                creates.append((index, item.data.dict()))
+        elif item.id is None:
+            results[index] = _result(index, item, "invalid", detail="id is required")
+        elif state.get(item.id) is None:
+            results[index] = _result(index, item, "not_found")
+        elif item.op == "update":
+            if item.data is None:
+                results[index] = _result(index, item, "invalid", detail="data is required")
+            else:
+                state[item.id] = {**state[item.id], **item.data.dict(), "id": item.id}
+                touched.add(item.id)
+                results[index] = _result(index, item, "updated")
+        else:
+            state[item.id] = None
+            touched.add(item.id)
+            results[index] = _result(index, item, "deleted")
+
+    deleted = sorted(row_id for row_id in touched if state[row_id] is None)
+    updated = [state[row_id] for row_id in sorted(touched) if state[row_id] is not None]
+    for chunk in _chunks(deleted):
+        db.execute(delete(model).where(model.id.in_(chunk)))
+    if updated:
+        # ORM bulk UPDATE by primary key: one executemany
+        db.execute(update(model), updated)
+
+    created = []
+    if creates:
+        stmt = insert(model).returning(model.id, sort_by_parameter_order=True)
+        new_ids = db.scalars(stmt, [values for _, values in creates]).all()
+        for (index, values), row_id in zip(creates, new_ids):
+            created.append({**values, "id": row_id})
+            results[index] = _result(index, operations[index], "created", row_id=row_id)
+
+    changes = RollupChanges()
+    for row_id in touched:
+        _record(changes, data_type, original[row_id], state[row_id])
+    for row in created:
+        _record(changes, data_type, None, row)
+    if touched or created:
+        apply_rollup_changes(db, changes)
+        bump_data_version(db, data_type)
+
+    applied = sum(1 for result in results if result["status"] in ("created", "updated", "deleted"))
+    return {
+        "status": "success",
+        "table": data_type,
+        "applied": applied,
+        "failed": len(operations) - applied,
+        "results": results,
+    }
@@ -0,0 +1,212 @@
+"""
+Zip bundles of the three CSVs, loaded as one consistent refresh.
+
+One parser thread streams the CSVs out of the archive (``archive.open``, so a
+member is never decompressed whole) and converts them chunk by chunk. The
+chunks go through a bounded queue to the calling thread, which writes them
+in dependency order (employees, projects, then timesheets) inside its single
+transaction. Writing a chunk therefore overlaps parsing the next ones, and at
+most ``BUNDLE_QUEUE_CHUNKS`` converted chunks are held at any time, whatever
+the size of the bundle. Before each timesheets chunk is written, the employee
+and project ids it references that were not checked yet are looked up with a
+few ``IN`` queries instead of a check per row.
+"""
+import os
+import posixpath
+import queue
+import threading
+import time
+import zipfile
+from contextlib import closing
+from typing import BinaryIO, Dict, Iterator, List, Set, Tuple
+
+from fastapi import UploadFile
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.employee import Employee
+from app.models.project import Project
+from app.utils.cache import bump_data_version
+from app.utils.csv_loader import read_csv_file
+from app.utils.ingest import (
+    ColumnChunk, column_chunks, file_fingerprint, previous_upload, skipped_upload, store_fingerprint,
+    upsert_columns,
+)
+from app.utils.metrics import record_upload
+from app.utils.rollups import RollupChanges, apply_rollup_changes
+
+# Load order: every table only references tables loaded before it
+BUNDLE_TABLES = ("employees", "projects", "timesheets")
+
+# data_type -> {column: referenced model}
+REFERENCES = {
+    "timesheets": {"employee_id": Employee, "project_id": Project},
+}
+
+# Converted chunks the parser may run ahead of the writer
+BUNDLE_QUEUE_CHUNKS = int(os.getenv("BUNDLE_QUEUE_CHUNKS", "4"))
+
+# Keeps the referential lookups under SQLite's bound-parameter limit
+_REFERENCE_BATCH = 500
+# Missing ids quoted in a referential error
+_MISSING_SHOWN = 10
+# Seconds between checks for an abandoned load while the queue is full
+_PUT_POLL = 0.1
+# Queued after the last chunk of a member
+_END = object()
+
+
+def bundle_members(archive: zipfile.ZipFile) -> Dict[str, zipfile.ZipInfo]:
+    """
+    ``data_type -> member`` for the CSVs in the archive.
+
+    Members are matched by file name (``employees.csv`` etc.) in any folder;
+    other files are ignored.
+    """
+    members = {}
+    for info in archive.infolist():
+        if info.is_dir() or info.filename.startswith("__MACOSX/"):
+            continue
+        name = posixpath.basename(info.filename).lower()
+        data_type, extension = posixpath.splitext(name)
+        if extension != ".csv" or data_type not in BUNDLE_TABLES:
+            continue
+        if data_type in members:
+            raise ValueError(f"The bundle contains more than one {name}")
+        members[data_type] = info
+    if not members:
+        raise ValueError(f"The bundle contains none of: {', '.join(t + '.csv' for t in BUNDLE_TABLES)}")
+    return members
+
+
+class BundleParser:
+    """
+    Parses archive members on a background thread, one member after the
+    other, handing converted chunks over through a bounded queue.
+
+    Use as a context manager; leaving it stops the thread, also when the
+    caller gave up half way (e.g. on an unknown reference).
+    """
+
+    def __init__(self, archive: zipfile.ZipFile, members: List[Tuple[str, zipfile.ZipInfo]]):
+        self.archive = archive
+        self.members = members
+        self._queue: queue.Queue = queue.Queue(maxsize=max(BUNDLE_QUEUE_CHUNKS, 1))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="bundle-parser", daemon=True)
+
+    def __enter__(self) -> "BundleParser":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _put(self, item) -> bool:
+        """Queue ``item`` once there is room; False when the load was abandoned meanwhile."""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=_PUT_POLL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self) -> None:
+        try:
+            for data_type, info in self.members:
+                # the reader is closed before its member, also when parsing stops early
+                with self.archive.open(info) as handle, closing(
+                    read_csv_file(UploadFile(handle, filename=info.filename), data_type)
+                ) as frames:
+                    for chunk in column_chunks(data_type, frames):
+                        if not self._put(chunk):
+                            return
+                if not self._put(_END):
+                    return
+        except BaseException as exc:
+            self._put(exc)
+
+    def chunks(self) -> Iterator[ColumnChunk]:
+        """The chunks of the next member, in file order; re-raises parse errors."""
+        while True:
+            item = self._queue.get()
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+
+def check_references(db: Session, data_type: str, references: Dict[str, Set[int]]) -> None:
+    """Raise if any referenced id is missing from its table (as of the caller's transaction)."""
+    for column, model in REFERENCES.get(data_type, {}).items():
+        ids = sorted(references.get(column, ()))
+        found = set()
+        for start in range(0, len(ids), _REFERENCE_BATCH):
+            batch = ids[start:start + _REFERENCE_BATCH]
+            found.update(db.execute(select(model.id).where(model.id.in_(batch))).scalars())
+        missing = [row_id for row_id in ids if row_id not in found]
+        if missing:
+            shown = ", ".join(str(row_id) for row_id in missing[:_MISSING_SHOWN])
+            more = f" and {len(missing) - _MISSING_SHOWN} more" if len(missing) > _MISSING_SHOWN else ""
+            raise ValueError(
+                f"{data_type}.{column} references {len(missing)} unknown {model.__tablename__} id(s): {shown}{more}"
+            )
+
+
+def _checked_chunks(db: Session, data_type: str, chunks: Iterator[ColumnChunk]) -> Iterator[ColumnChunk]:
+    """``chunks``, each checked for unknown references before it is written; ids are looked up once."""
+    checked = {column: set() for column in REFERENCES.get(data_type, {})}
+    for chunk in chunks:
+        references = {}
+        for column, known in checked.items():
+            if column in chunk.names:
+                ids = set(chunk.values[chunk.names.index(column)])
+                ids.discard(None)
+                references[column] = ids - known
+        check_references(db, data_type, references)
+        for column, ids in references.items():
+            checked[column] |= ids
+        yield chunk
+
+
+def load_bundle(db: Session, fileobj: BinaryIO) -> dict:
+    """
+    Load the zip bundle in ``fileobj`` into the caller's transaction; the
+    caller commits. Returns the upload stats per table.
+
+    Unchanged files are skipped per table like single uploads. The rollups
+    are refreshed once at the end for everything that changed.
+    """
+    tables = {}
+    changes = RollupChanges()
+    with zipfile.ZipFile(fileobj) as archive:
+        # (data_type, file hash, member) of the files that must be loaded, in load order
+        pending: List[Tuple[str, str, zipfile.ZipInfo]] = []
+        members = bundle_members(archive)
+        for data_type in BUNDLE_TABLES:
+            if data_type not in members:
+                continue
+            started = time.perf_counter()
+            with archive.open(members[data_type]) as handle:
+                file_hash = file_fingerprint(handle)
+            previous = previous_upload(db, data_type, file_hash)
+            if previous is not None:
+                # unchanged since its last upload: not even parsed
+                tables[data_type] = skipped_upload(previous, time.perf_counter() - started)
+            else:
+                pending.append((data_type, file_hash, members[data_type]))
+
+        with BundleParser(archive, [(data_type, info) for data_type, _, info in pending]) as parser:
+            for data_type, file_hash, _ in pending:
+                started = time.perf_counter()
+                stats = upsert_columns(db, data_type, _checked_chunks(db, data_type, parser.chunks()), changes)
+                if stats["rows_inserted"] or stats["rows_updated"]:
+                    bump_data_version(db, data_type)
+                store_fingerprint(db, data_type, file_hash, stats["rows_processed"])
+                record_upload(data_type, stats["rows_processed"], time.perf_counter() - started)
+                tables[data_type] = {"skipped": False, "file_hash": file_hash, **stats}
+    apply_rollup_changes(db, changes)
+    return {data_type: tables[data_type] for data_type in BUNDLE_TABLES if data_type in tables}
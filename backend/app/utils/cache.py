@@ -0,0 +1,192 @@
+"""
+Versioned cache for analytics responses.
+
+Every write path calls ``bump_data_version`` inside its transaction. Cached
+analytics bodies are keyed by the resulting data version, so a write from
+any worker invalidates them without explicit purging, and the version doubles
+as a strong ETag for conditional requests. Bodies of at least
+``ANALYTICS_GZIP_MIN_BYTES`` are also cached gzip-compressed for clients that
+accept it, so compression runs once per data version, not once per request.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db.database import dialect_insert
+from app.models.data_version import DataVersion
+from app.utils.serialization import accepts_gzip, dumps, gzip_body
+
+data_versions = DataVersion.__table__
+_version_query = select(data_versions.c.name, data_versions.c.version).order_by(data_versions.c.name)
+
+# Max cached responses per worker
+CACHE_SIZE = int(os.getenv("ANALYTICS_CACHE_SIZE", "128"))
+# How long a worker trusts its last read of the version row; writes made by
+# this worker are seen immediately, writes from other workers within this window
+VERSION_TTL = float(os.getenv("ANALYTICS_VERSION_TTL", "1.0"))
+# Smallest encoded body worth gzipping
+GZIP_MIN_BYTES = int(os.getenv("ANALYTICS_GZIP_MIN_BYTES", "1024"))
+
+
+class AnalyticsCache:
+    """Thread-safe LRU of encoded response bodies with hit/miss counters."""
+
+    def __init__(self, maxsize: int = CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / total) if total else None,
+            }
+
+
+class DataVersionTracker:
+    """Reads the data version from the database at most once per ``ttl`` seconds."""
+
+    def __init__(self, ttl: float = VERSION_TTL):
+        self.ttl = ttl
+        self._token = None
+        self._read_at = 0.0
+        self._lock = threading.Lock()
+
+    def _cached(self) -> Optional[str]:
+        with self._lock:
+            if self._token is not None and time.monotonic() - self._read_at < self.ttl:
+                return self._token
+        return None
+
+    def _store(self, rows) -> str:
+        token = ",".join(f"{name}:{version}" for name, version in rows) or "0"
+        with self._lock:
+            self._token = token
+            self._read_at = time.monotonic()
+        return token
+
+    def current(self, db: Session) -> str:
+        return self._cached() or self._store(db.execute(_version_query))
+
+    async def current_async(self, db: AsyncSession) -> str:
+        return self._cached() or self._store(await db.execute(_version_query))
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._token = None
+
+
+analytics_cache = AnalyticsCache()
+version_tracker = DataVersionTracker()
+
+
+def bump_data_version(db: Session, *names: str) -> None:
+    """Increment the version of each written table inside the caller's transaction."""
+    stmt = dialect_insert(db, data_versions)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[data_versions.c.name],
+        set_={"version": data_versions.c.version + 1},
+    )
+    db.execute(stmt, [{"name": name, "version": 1} for name in names])
+    version_tracker.invalidate()
+
+
+def table_version(db: Session, name: str) -> int:
+    """Current version of one table (0 before its first write); reads the caller's transaction."""
+    stmt = select(data_versions.c.version).where(data_versions.c.name == name)
+    return db.execute(stmt).scalar() or 0
+
+
+def get_data_version(db: Session) -> str:
+    return version_tracker.current(db)
+
+
+async def get_data_version_async(db: AsyncSession) -> str:
+    return await version_tracker.current_async(db)
+
+
+def _etag(version: str, key) -> str:
+    digest = hashlib.blake2b(f"{version}|{key}".encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+async def cached_response(
+    request: Request, db: AsyncSession, compute: Callable[[], Awaitable[Any]]
+) -> Response:
+    """
+    Serve ``await compute()`` as JSON from the cache for the current data version.
+
+    Hits never run the analytics queries; clients that send the current ETag
+    in If-None-Match get a bodiless 304, once the response has been produced
+    for this data version. Encoding and compression run in the
+    threadpool. The gzip representation has its own ETag.
+    """
+    version = await get_data_version_async(db)
+    key = (request.url.path, tuple(sorted(request.query_params.multi_items())))
+    etag = _etag(version, key)
+    gzip_etag = f'{etag[:-1]}-gzip"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+    body = analytics_cache.get((key, version))
+    if body is None:
+        # computed before any 304, so a query that fails (e.g. an unknown id) is never "not modified"
+        body = await run_in_threadpool(dumps, await compute())
+        analytics_cache.put((key, version), body)
+
+    # both representations carry the same data version and query
+    for tag in (etag, gzip_etag):
+        if _etag_matches(request.headers.get("if-none-match"), tag):
+            return Response(status_code=304, headers={**headers, "ETag": tag})
+    if len(body) >= GZIP_MIN_BYTES and accepts_gzip(request.headers.get("accept-encoding", "")):
+        compressed = analytics_cache.get((key, version, "gzip"))
+        if compressed is None:
+            compressed = await run_in_threadpool(gzip_body, body)
+            analytics_cache.put((key, version, "gzip"), compressed)
+        headers.update({"ETag": gzip_etag, "Content-Encoding": "gzip"})
+        body = compressed
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,423 @@
+"""
+In-memory columnar analytics engine.
+
+Timesheets are held as NumPy arrays (employee_id, project_id, hours, work
+date) next to
+dense per-employee (rate, department) and per-project (revenue) arrays. All
+aggregates are ``np.bincount`` scatter-adds over those arrays, so computing a
+snapshot costs a handful of vectorized passes instead of a SQL join. A period
+(start/end) is a boolean mask over the work-date array.
+
+The store keeps the arrays between requests and reloads only the tables whose
+data version changed. Timesheets are read from the DB cursor in batches
+straight into a preallocated float array (work dates as epoch seconds), so a
+reload builds no per-row Python objects. NumPy is optional; without it only
+the SQL engine is available.
+"""
+import importlib.util
+import os
+import threading
+from datetime import date
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+from sqlalchemy import extract, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.employee import Employee
+from app.models.project import Project
+from app.models.timesheet import Timesheet
+
+# NumPy is imported where it is used, so it is only loaded once the numpy engine runs
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+ANALYTICS_ENGINES = ("sql", "numpy")
+# Engine used when a request does not pass ?engine=
+DEFAULT_ENGINE = os.getenv("ANALYTICS_ENGINE", "sql")
+
+# Each table is loaded with one narrow, id-ordered query
+TABLE_QUERIES = {
+    "employees": select(Employee.id, Employee.name, Employee.department, Employee.hourly_rate).order_by(Employee.id),
+    "projects": select(Project.id, Project.name, Project.revenue).order_by(Project.id),
+    # all-numeric, so the raw cursor rows fill a float array directly
+    "timesheets": select(
+        Timesheet.employee_id, Timesheet.project_id, Timesheet.hours_worked, extract("epoch", Timesheet.work_date)
+    ),
+}
+# Cursor rows fetched per batch when reading timesheets
+_FETCH_BATCH = 20000
+
+
+def resolve_engine(engine: Optional[str]) -> str:
+    """Validate an engine name (``None`` means the configured default)."""
+    engine = engine or DEFAULT_ENGINE
+    if engine not in ANALYTICS_ENGINES:
+        raise ValueError(f"Unknown analytics engine '{engine}'")
+    if engine == "numpy" and not NUMPY_AVAILABLE:
+        raise ValueError("The numpy analytics engine requires NumPy to be installed")
+    return engine
+
+
+def table_versions(version: str) -> Dict[str, str]:
+    """Split a data version token (``employees:1,projects:2,...``) per table."""
+    parts = (part.split(":", 1) for part in version.split(",") if ":" in part)
+    return {name: value for name, value in parts}
+
+
+def _grouped_sum(values, groups, n_groups: int):
+    """Sum each row of ``values`` (scenarios x items) by item group: one bincount over all rows."""
+    import numpy as np
+
+    n_rows = values.shape[0]
+    offsets = (np.arange(n_rows, dtype=np.int64) * n_groups)[:, None]
+    totals = np.bincount((offsets + groups).ravel(), weights=values.ravel(), minlength=n_rows * n_groups)
+    return totals.reshape(n_rows, n_groups)
+
+
+def _lookup(ids, keys):
+    """Row index of each key in the sorted ``ids`` array, and whether it was found."""
+    import numpy as np
+
+    if len(ids) == 0:
+        return np.zeros(len(keys), dtype=np.int64), np.zeros(len(keys), dtype=bool)
+    index = np.minimum(np.searchsorted(ids, keys), len(ids) - 1)
+    return index, ids[index] == keys
+
+
+class ColumnarStore:
+    """NumPy copies of the three tables, refreshed per table version."""
+
+    def __init__(self):
+        self._versions: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.employee_ids = self.employee_names = self.employee_departments = self.rates = None
+        self.project_ids = self.project_names = self.revenues = None
+        self.ts_employee = self.ts_project = self.ts_hours = self.ts_dates = None
+        self.ts_known = None
+
+    def stale_tables(self, version: str) -> list:
+        current = table_versions(version)
+        with self._lock:
+            return [
+                table for table in TABLE_QUERIES
+                if table not in self._versions or self._versions[table] != current.get(table, "0")
+            ]
+
+    def _load(self, table: str, rows) -> None:
+        import numpy as np
+
+        if table == "employees":
+            self.employee_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+            self.employee_names = [row[1] for row in rows]
+            self.employee_departments = [row[2] for row in rows]
+            self.rates = np.fromiter((row[3] or 0.0 for row in rows), dtype=np.float64, count=len(rows))
+        elif table == "projects":
+            self.project_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+            self.project_names = [row[1] for row in rows]
+            self.revenues = np.fromiter((row[2] or 0.0 for row in rows), dtype=np.float64, count=len(rows))
+        else:
+            # ``rows`` is the (n, 4) float array from read_timesheets;
+            # NULL ids arrive as NaN, and such rows never match an employee/project
+            ids = rows[:, :2]
+            self.ts_known = ~np.isnan(ids)
+            ids = np.nan_to_num(ids).astype(np.int64)
+            self.ts_employee, self.ts_project = ids[:, 0], ids[:, 1]
+            self.ts_hours = rows[:, 2].copy()
+            # NULL dates become NaT, which falls outside every period
+            seconds = rows[:, 3]
+            dated = ~np.isnan(seconds)
+            self.ts_dates = np.full(len(rows), np.datetime64("NaT"), dtype="datetime64[D]")
+            self.ts_dates[dated] = (seconds[dated] // 86400).astype(np.int64).astype("datetime64[D]")
+
+    def _refresh(self, version: str, loaded: dict) -> None:
+        current = table_versions(version)
+        for table, rows in loaded.items():
+            self._load(table, rows)
+            self._versions[table] = current.get(table, "0")
+
+    def update(
+        self, version: str, loaded: dict, start: Optional[date] = None, end: Optional[date] = None
+    ):
+        """Swap in freshly read tables and compute the snapshot (for ``start``..``end``), atomically."""
+        with self._lock:
+            self._refresh(version, loaded)
+            return self._compute(start, end)
+
+    def scenarios(
+        self,
+        version: str,
+        loaded: dict,
+        scenarios: list,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> list:
+        """Swap in freshly read tables and evaluate what-if ``scenarios`` against them, atomically."""
+        with self._lock:
+            self._refresh(version, loaded)
+            return self._compute_scenarios(scenarios, start, end)
+
+    def _period_mask(self, start: Optional[date], end: Optional[date]):
+        import numpy as np
+
+        mask = np.ones(len(self.ts_hours), dtype=bool)
+        if start is not None:
+            mask &= self.ts_dates >= np.datetime64(start, "D")
+        if end is not None:
+            mask &= self.ts_dates <= np.datetime64(end, "D")
+        return mask
+
+    def _rows(self, start: Optional[date], end: Optional[date]):
+        """Per-timesheet employee/project indexes and which rows count in the period."""
+        e_idx, e_ok = _lookup(self.employee_ids, self.ts_employee)
+        p_idx, p_ok = _lookup(self.project_ids, self.ts_project)
+        in_period = self._period_mask(start, end)
+        e_ok &= self.ts_known[:, 0] & in_period
+        p_ok &= self.ts_known[:, 1] & in_period
+        return e_idx, e_ok, p_idx, p_ok
+
+    def _department_codes(self, active):
+        """Departments of the ``active`` employees (NULL first) and each one's dense code."""
+        import numpy as np
+
+        departments = sorted(
+            {self.employee_departments[i] for i in active}, key=lambda d: (d is not None, d or "")
+        )
+        code_of = {department: code for code, department in enumerate(departments)}
+        codes = np.fromiter((code_of[self.employee_departments[i]] for i in active), dtype=np.int64, count=len(active))
+        return departments, codes
+
+    def _compute(self, start: Optional[date] = None, end: Optional[date] = None):
+        import numpy as np
+
+        from app.api.analytics import _overall_result
+
+        n_employees, n_projects = len(self.employee_ids), len(self.project_ids)
+        hours = self.ts_hours
+        e_idx, e_ok, p_idx, p_ok = self._rows(start, end)
+
+        # revenue is shared by all hours booked on the project, known employee or not
+        allocation = np.bincount(p_idx[p_ok], weights=hours[p_ok], minlength=n_projects)
+        cost = np.where(e_ok, hours * self.rates[e_idx] if n_employees else 0.0, 0.0)
+        total_cost = float(cost.sum())
+
+        both = e_ok & p_ok
+        e, p, h, c = e_idx[both], p_idx[both], hours[both], cost[both]
+        project_allocation = allocation[p]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            revenue = np.where(project_allocation > 0, h / project_allocation * self.revenues[p], 0.0)
+
+        employee_entries = np.bincount(e, minlength=n_employees)
+        employee_hours = np.bincount(e, weights=h, minlength=n_employees)
+        employee_cost = np.bincount(e, weights=c, minlength=n_employees)
+        employee_revenue = np.bincount(e, weights=revenue, minlength=n_employees)
+        project_entries = np.bincount(p, minlength=n_projects)
+        project_hours = np.bincount(p, weights=h, minlength=n_projects)
+        project_cost = np.bincount(p, weights=c, minlength=n_projects)
+
+        # departments as dense codes over the employees that have timesheets
+        active = np.flatnonzero(employee_entries)
+        departments, codes = self._department_codes(active)
+        department_totals = [
+            np.bincount(codes, weights=values[active], minlength=len(departments))
+            for values in (employee_hours, employee_cost, employee_revenue)
+        ]
+
+        return self._assemble(
+            active, employee_hours, employee_cost, employee_revenue,
+            np.flatnonzero(project_entries), project_hours, project_cost, self.revenues,
+            departments, department_totals,
+            _overall_result(total_cost, self._period_revenue(p_idx[p_ok], start, end)),
+        )
+
+    def _assemble(
+        self, active, employee_hours, employee_cost, employee_revenue,
+        projects, project_hours, project_cost, project_revenue,
+        departments, department_totals, overall,
+    ):
+        """Build the snapshot rows from per-employee, per-project and per-department arrays."""
+        from app.api.analytics import _department_summary_row, _employee_roi_row, _project_profit_row
+        from app.schemas.analytics_schema import AnalyticsSnapshot
+
+        return AnalyticsSnapshot(
+            employee_roi=[
+                _employee_roi_row(SimpleNamespace(
+                    employee_id=int(self.employee_ids[i]), employee_name=self.employee_names[i],
+                    department=self.employee_departments[i], total_hours=employee_hours[i],
+                    total_cost=employee_cost[i], total_revenue=employee_revenue[i],
+                ))
+                for i in active
+            ],
+            project_profit=[
+                _project_profit_row(SimpleNamespace(
+                    project_id=int(self.project_ids[i]), project_name=self.project_names[i],
+                    total_hours=project_hours[i], total_cost=project_cost[i], total_revenue=project_revenue[i],
+                ))
+                for i in projects
+            ],
+            department_summary=[
+                _department_summary_row(SimpleNamespace(
+                    department=department, total_hours=department_totals[0][code],
+                    total_cost=department_totals[1][code], total_revenue=department_totals[2][code],
+                ))
+                for code, department in enumerate(departments)
+            ],
+            overall=overall,
+        )
+
+    def _compute_scenarios(self, scenarios: list, start: Optional[date] = None, end: Optional[date] = None) -> list:
+        """
+        Snapshots for every scenario at once.
+
+        Hours do not depend on rates or revenues, so the timesheets are
+        reduced once to the (employee, project) grain. Cost and revenue are
+        linear in the rates and revenues, so each is one matrix pass over
+        that grain with a row per scenario.
+        """
+        import numpy as np
+
+        from app.api.analytics import _overall_result
+
+        n_employees, n_projects = len(self.employee_ids), len(self.project_ids)
+        rates = self._override_matrix(scenarios, "rates")
+        revenues = self._override_matrix(scenarios, "revenues")
+
+        hours = self.ts_hours
+        e_idx, e_ok, p_idx, p_ok = self._rows(start, end)
+        allocation = np.bincount(p_idx[p_ok], weights=hours[p_ok], minlength=n_projects)
+        # hours of each employee that carry cost, including those on unknown projects
+        costed_hours = np.bincount(e_idx[e_ok], weights=hours[e_ok], minlength=n_employees)
+
+        both = e_ok & p_ok
+        pairs, pair_index = np.unique(e_idx[both] * n_projects + p_idx[both], return_inverse=True)
+        pair_e, pair_p = pairs // max(n_projects, 1), pairs % max(n_projects, 1)
+        pair_hours = np.bincount(pair_index, weights=hours[both], minlength=len(pairs))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            share = np.where(allocation[pair_p] > 0, pair_hours / allocation[pair_p], 0.0)
+
+        employee_hours = np.bincount(pair_e, weights=pair_hours, minlength=n_employees)
+        project_hours = np.bincount(pair_p, weights=pair_hours, minlength=n_projects)
+        employee_cost = rates * employee_hours
+        employee_revenue = _grouped_sum(revenues[:, pair_p] * share, pair_e, n_employees)
+        project_cost = _grouped_sum(rates[:, pair_e] * pair_hours, pair_p, n_projects)
+        total_cost = rates @ costed_hours
+        if start is None and end is None:
+            total_revenue = revenues.sum(axis=1)
+        else:
+            # only projects worked on in the period count towards its revenue
+            worked = np.bincount(p_idx[p_ok], minlength=n_projects) > 0
+            total_revenue = revenues[:, worked].sum(axis=1)
+
+        active = np.unique(pair_e)
+        projects = np.unique(pair_p)
+        departments, codes = self._department_codes(active)
+        department_hours = np.bincount(codes, weights=employee_hours[active], minlength=len(departments))
+        department_cost = _grouped_sum(employee_cost[:, active], codes, len(departments))
+        department_revenue = _grouped_sum(employee_revenue[:, active], codes, len(departments))
+
+        return [
+            self._assemble(
+                active, employee_hours, employee_cost[s], employee_revenue[s],
+                projects, project_hours, project_cost[s], revenues[s],
+                departments, (department_hours, department_cost[s], department_revenue[s]),
+                _overall_result(total_cost[s], total_revenue[s]),
+            )
+            for s in range(len(scenarios))
+        ]
+
+    def _override_matrix(self, scenarios: list, kind: str):
+        """One row per scenario: the current rates (or revenues) with that scenario's overrides applied."""
+        import numpy as np
+
+        base = self.rates if kind == "rates" else self.revenues
+        matrix = np.tile(base, (len(scenarios), 1))
+        departments = {}
+        for s, scenario in enumerate(scenarios):
+            for override in getattr(scenario, kind):
+                if kind == "rates":
+                    mask = self._selection(self.employee_ids, override.employee_id, "employee")
+                    if override.department is not None:
+                        if override.department not in departments:
+                            departments[override.department] = np.fromiter(
+                                (d == override.department for d in self.employee_departments),
+                                dtype=bool, count=len(self.employee_departments),
+                            )
+                        mask = mask & departments[override.department]
+                        if not mask.any():
+                            raise ValueError(f"No employees match department '{override.department}'")
+                    value = override.hourly_rate
+                else:
+                    mask = self._selection(self.project_ids, override.project_id, "project")
+                    value = override.revenue
+                if (override.factor is None) == (value is None):
+                    field = "hourly_rate" if kind == "rates" else "revenue"
+                    raise ValueError(f"Each {kind[:-1]} override needs exactly one of factor or {field}")
+                if value is not None:
+                    matrix[s, mask] = value
+                else:
+                    matrix[s, mask] *= override.factor
+        return matrix
+
+    @staticmethod
+    def _selection(ids, row_id: Optional[int], label: str):
+        """Mask over ``ids`` selecting ``row_id``, or everything when it is None."""
+        import numpy as np
+
+        if row_id is None:
+            return np.ones(len(ids), dtype=bool)
+        index, found = _lookup(ids, np.array([row_id], dtype=np.int64))
+        if not found[0]:
+            raise ValueError(f"Unknown {label} id {row_id}")
+        mask = np.zeros(len(ids), dtype=bool)
+        mask[index[0]] = True
+        return mask
+
+    def _period_revenue(self, project_index, start, end) -> float:
+        import numpy as np
+
+        if start is None and end is None:
+            return float(self.revenues.sum())
+        # only projects worked on in the period count towards its revenue
+        worked = np.bincount(project_index, minlength=len(self.project_ids)) > 0
+        return float(self.revenues[worked].sum())
+
+
+columnar_store = ColumnarStore()
+
+
+def read_timesheets(db: Session):
+    """All timesheets as an (n, 4) float array: employee id, project id, hours, work date in epoch seconds."""
+    import numpy as np
+
+    # sized from a count; rows written between the two statements grow it
+    columns = np.empty((db.execute(select(func.count()).select_from(Timesheet)).scalar(), 4), dtype=np.float64)
+    result = db.connection().execute(TABLE_QUERIES["timesheets"])
+    filled = 0
+    try:
+        # plain driver tuples, without SQLAlchemy's per-row Row objects
+        while batch := result.cursor.fetchmany(_FETCH_BATCH):
+            if filled + len(batch) > len(columns):
+                columns = np.concatenate((columns, np.empty((max(len(batch), len(columns)), 4))))
+            columns[filled:filled + len(batch)] = batch
+            filled += len(batch)
+    finally:
+        result.close()
+    return columns[:filled]
+
+
+def read_stale_tables(db: Session, version: str) -> dict:
+    """The tables ``columnar_store`` needs reloaded for ``version``; pass to ``update``."""
+    return {
+        table: read_timesheets(db) if table == "timesheets" else db.execute(TABLE_QUERIES[table]).all()
+        for table in columnar_store.stale_tables(version)
+    }
+
+
+def columnar_snapshot(db: Session, version: str, start: Optional[date] = None, end: Optional[date] = None):
+    """Snapshot from the columnar store, reloading the tables changed since ``version``."""
+    return columnar_store.update(version, read_stale_tables(db, version), start, end)
+
+
+async def load_stale_tables(db: AsyncSession, version: str) -> dict:
+    """Async ``read_stale_tables``."""
+    return await db.run_sync(read_stale_tables, version)
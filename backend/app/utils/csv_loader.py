@@ -1,9 +1,62 @@
-import pandas as pd
+from typing import TYPE_CHECKING, Iterator
+
 from fastapi import UploadFile
-from io import StringIO
 
-def read_csv_file(file: UploadFile):
-    """Reads uploaded CSV file and returns a pandas DataFrame."""
-    content = file.file.read().decode("utf-8")
-    df = pd.read_csv(StringIO(content))
-    return df
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Explicit column dtypes for each uploadable CSV; columns not listed here are skipped
+CSV_SCHEMAS = {
+    "employees": {
+        "id": "int64",
+        "name": "string",
+        "department": "string",
+        "hourly_rate": "float64",
+    },
+    "projects": {
+        "id": "int64",
+        "name": "string",
+        "revenue": "float64",
+    },
+    "timesheets": {
+        "id": "int64",
+        "employee_id": "int64",
+        "project_id": "int64",
+        "hours_worked": "float64",
+        "work_date": "date",
+    },
+}
+
+# Columns that may be left out of a CSV; existing values are kept when they are
+OPTIONAL_COLUMNS = {
+    "timesheets": {"work_date"},
+}
+
+# Dates are read as text and parsed column-wise during conversion
+_READ_DTYPES = {"date": "string"}
+
+DEFAULT_CHUNK_SIZE = 20_000
+
+
+def read_csv_file(
+    file: UploadFile, data_type: str, chunksize: int = DEFAULT_CHUNK_SIZE
+) -> Iterator["pd.DataFrame"]:
+    """
+    Stream an uploaded CSV file as typed DataFrame chunks of at most ``chunksize`` rows.
+
+    The spooled upload is parsed straight from its binary handle, so only one
+    chunk is held in memory at a time regardless of the file size.
+    """
+    import pandas as pd  # deferred: pandas is only needed once an upload arrives
+
+    schema = CSV_SCHEMAS[data_type]
+    file.file.seek(0)
+    reader = pd.read_csv(
+        file.file,
+        encoding="utf-8-sig",
+        dtype={name: _READ_DTYPES.get(dtype, dtype) for name, dtype in schema.items()},
+        usecols=lambda column: column in schema,
+        chunksize=chunksize,
+    )
+    with reader:
+        yield from reader
@@ -0,0 +1,225 @@
+"""
+Analytics history: persisted snapshots for trend queries.
+
+``HistoryRecorder`` runs in every worker's event loop. Every
+``HISTORY_INTERVAL`` seconds, and after each upload that changed data, it
+stores the current analytics snapshot. Only the summed totals are stored, one row per
+employee, project and department, and derived ratios are recomputed on read.
+A snapshot is recorded at most once per data version, so idle periods and
+several workers recording the same data add nothing.
+
+After each recording the retention policy thins older snapshots: all are
+kept for ``HISTORY_KEEP_ALL_HOURS``, then the last one per hour for
+``HISTORY_KEEP_HOURLY_DAYS``, then the last one per day for
+``HISTORY_KEEP_DAILY_DAYS`` (0 keeps daily snapshots forever). The newest
+snapshot is always kept.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal, dialect_insert
+from app.models.analytics_history import AnalyticsHistory, AnalyticsHistoryRow
+from app.utils.cache import get_data_version
+
+snapshots = AnalyticsHistory.__table__
+history_rows = AnalyticsHistoryRow.__table__
+
+# Seconds between scheduled snapshots; 0 records only after uploads
+HISTORY_INTERVAL = float(os.getenv("HISTORY_INTERVAL", "3600"))
+# Record a snapshot as soon as an upload has changed data
+HISTORY_ON_UPLOAD = os.getenv("HISTORY_ON_UPLOAD", "1") != "0"
+HISTORY_KEEP_ALL_HOURS = float(os.getenv("HISTORY_KEEP_ALL_HOURS", "48"))
+HISTORY_KEEP_HOURLY_DAYS = float(os.getenv("HISTORY_KEEP_HOURLY_DAYS", "30"))
+HISTORY_KEEP_DAILY_DAYS = float(os.getenv("HISTORY_KEEP_DAILY_DAYS", "365"))
+
+# Row kinds and the snapshot part each one is recorded from
+HISTORY_KINDS = {
+    "employee": ("employee_roi", "employee_id"),
+    "project": ("project_profit", "project_id"),
+    "department": ("department_summary", "department"),
+}
+
+# Keeps retention deletes under SQLite's bound-parameter limit
+_DELETE_BATCH = 500
+
+history_log = logging.getLogger("app.history")
+
+
+class RecordedSnapshot(NamedTuple):
+    id: int
+    data_version: str
+    taken_at: datetime
+    created: bool
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def history_key(value) -> str:
+    """Row key of an employee/project id or a department name ("" for no department)."""
+    return "" if value is None else str(value)
+
+
+def record_snapshot(db: Session, now: Optional[datetime] = None) -> RecordedSnapshot:
+    """
+    Store the current analytics snapshot in the caller's transaction, unless
+    its data version is already recorded; the caller commits.
+    """
+    from app.api.analytics import current_snapshot
+
+    version = get_data_version(db)
+    existing = db.execute(
+        select(snapshots.c.id, snapshots.c.taken_at).where(snapshots.c.data_version == version)
+    ).first()
+    if existing is not None:
+        return RecordedSnapshot(existing.id, version, existing.taken_at, False)
+
+    # shared with the analytics routes through the response cache
+    snapshot = current_snapshot(db)
+    taken_at = now or _utcnow()
+    stmt = (
+        dialect_insert(db, snapshots)
+        .values(
+            taken_at=taken_at,
+            data_version=version,
+            total_hours=sum(row.total_hours for row in snapshot.department_summary),
+            total_cost=snapshot.overall["total_cost"],
+            total_revenue=snapshot.overall["total_revenue"],
+        )
+        # another worker recorded this version first
+        .on_conflict_do_nothing(index_elements=[snapshots.c.data_version])
+        .returning(snapshots.c.id)
+    )
+    snapshot_id = db.execute(stmt).scalar()
+    if snapshot_id is None:
+        existing = db.execute(
+            select(snapshots.c.id, snapshots.c.taken_at).where(snapshots.c.data_version == version)
+        ).one()
+        return RecordedSnapshot(existing.id, version, existing.taken_at, False)
+
+    rows = [
+        {
+            "kind": kind,
+            "key": history_key(getattr(row, key_field)),
+            "snapshot_id": snapshot_id,
+            "total_hours": row.total_hours,
+            "total_cost": row.total_cost,
+            "total_revenue": row.total_revenue,
+        }
+        for kind, (part, key_field) in HISTORY_KINDS.items()
+        for row in getattr(snapshot, part)
+    ]
+    if rows:
+        db.execute(insert(history_rows), rows)
+    return RecordedSnapshot(snapshot_id, version, taken_at, True)
+
+
+def expired_snapshots(taken: Iterable[Tuple[int, datetime]], now: datetime) -> List[int]:
+    """Ids of the ``(id, taken_at)`` snapshots that the retention policy drops as of ``now``."""
+    keep_all = timedelta(hours=HISTORY_KEEP_ALL_HOURS)
+    keep_hourly = timedelta(days=HISTORY_KEEP_HOURLY_DAYS)
+    keep_daily = timedelta(days=HISTORY_KEEP_DAILY_DAYS)
+    kept_buckets = set()
+    expired = []
+    # newest first, so the first snapshot seen in a bucket is the last one taken in it
+    ordered = sorted(taken, key=lambda item: (item[1], item[0]), reverse=True)
+    for snapshot_id, taken_at in ordered[1:]:
+        age = now - taken_at
+        if age <= keep_all:
+            continue
+        if age <= keep_hourly:
+            bucket = ("hour", taken_at.replace(minute=0, second=0, microsecond=0))
+        elif not HISTORY_KEEP_DAILY_DAYS or age <= keep_daily:
+            bucket = ("day", taken_at.date())
+        else:
+            expired.append(snapshot_id)
+            continue
+        if bucket in kept_buckets:
+            expired.append(snapshot_id)
+        else:
+            kept_buckets.add(bucket)
+    return expired
+
+
+def prune_history(db: Session, now: Optional[datetime] = None) -> int:
+    """Apply the retention policy in the caller's transaction; returns the number of snapshots dropped."""
+    taken = db.execute(select(snapshots.c.id, snapshots.c.taken_at)).all()
+    expired = expired_snapshots(taken, now or _utcnow())
+    for start in range(0, len(expired), _DELETE_BATCH):
+        batch = expired[start:start + _DELETE_BATCH]
+        db.execute(delete(history_rows).where(history_rows.c.snapshot_id.in_(batch)))
+        db.execute(delete(snapshots).where(snapshots.c.id.in_(batch)))
+    return len(expired)
+
+
+def take_snapshot(now: Optional[datetime] = None) -> RecordedSnapshot:
+    """Record the current snapshot and apply the retention policy in one transaction."""
+    with SessionLocal() as db:
+        try:
+            recorded = record_snapshot(db, now)
+            prune_history(db, now)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    return recorded
+
+
+class HistoryRecorder:
+    """The snapshot task of this worker; started and stopped by the app lifespan."""
+
+    def __init__(self, interval: float = HISTORY_INTERVAL, on_upload: bool = HISTORY_ON_UPLOAD):
+        self.interval = interval
+        self.on_upload = on_upload
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0 or self.on_upload
+
+    def start(self) -> None:
+        if not self.enabled or self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+
+    def notify(self) -> None:
+        """Request a snapshot after an upload changed data; safe to call from any thread."""
+        if self.on_upload and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self) -> None:
+        while True:
+            # uploads that finish while recording trigger another round
+            self._wake.clear()
+            try:
+                await run_in_threadpool(take_snapshot)
+            except Exception:
+                history_log.exception("Recording an analytics snapshot failed")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval if self.interval > 0 else None)
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop(self) -> None:
+        task, self._task, self._loop = self._task, None, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+
+history_recorder = HistoryRecorder()
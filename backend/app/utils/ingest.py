@@ -0,0 +1,301 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.db.database import dialect_insert
+from app.models.employee import Employee
+from app.models.project import Project
+from app.models.timesheet import Timesheet
+from app.models.upload_fingerprint import UploadFingerprint
+from app.utils.cache import table_version
+from app.utils.csv_loader import CSV_SCHEMAS, OPTIONAL_COLUMNS
+from app.utils.rollups import RollupChanges
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Upload data_type -> model; the columns and their dtypes come from CSV_SCHEMAS
+INGEST_TABLES = {
+    "employees": Employee,
+    "projects": Project,
+    "timesheets": Timesheet,
+}
+
+class ColumnChunk(NamedTuple):
+    """One upload chunk as converted columns: the schema columns present and a value list per column."""
+    names: Tuple[str, ...]
+    values: List[list]
+
+
+# Keeps the "which ids already exist" lookup under SQLite's bound-parameter limit
+_ID_LOOKUP_BATCH = 500
+# Bytes hashed per read when fingerprinting an uploaded file
+_HASH_BLOCK_SIZE = 1 << 20
+
+
+def _convert_column(series: "pd.Series", dtype: str) -> list:
+    """Convert a whole column at once to plain Python values suitable for the DB driver."""
+    import pandas as pd  # deferred with the rest of the upload path
+
+    if dtype in ("int64", "float64"):
+        return series.astype(dtype).tolist()
+    if dtype == "date":
+        # ISO dates (YYYY-MM-DD); blanks become NULL
+        dates = pd.to_datetime(series, format="ISO8601")
+        return [value.date() if not pd.isna(value) else None for value in dates]
+    # strings: keep NaN/None as NULL instead of the text "nan"
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def chunk_columns(df: "pd.DataFrame", columns: Dict[str, str], optional=()) -> Dict[str, str]:
+    """The schema columns present in ``df``; raises if a required one is missing."""
+    missing = [name for name in columns if name not in df.columns and name not in optional]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+    return {name: dtype for name, dtype in columns.items() if name in df.columns}
+
+
+def chunk_to_columns(df: "pd.DataFrame", columns: Dict[str, str], optional=()) -> ColumnChunk:
+    """Convert the schema columns of a DataFrame chunk to lists of plain Python values."""
+    columns = chunk_columns(df, columns, optional)
+    return ColumnChunk(tuple(columns), [_convert_column(df[name], dtype) for name, dtype in columns.items()])
+
+
+def column_params(chunk: ColumnChunk) -> List[dict]:
+    """executemany parameters (one dict per row) from converted columns."""
+    return [dict(zip(chunk.names, row)) for row in zip(*chunk.values)]
+
+
+def chunk_to_params(df: "pd.DataFrame", columns: Dict[str, str], optional=()) -> List[dict]:
+    """Turn a DataFrame chunk into executemany parameters, converting column by column."""
+    return column_params(chunk_to_columns(df, columns, optional))
+
+
+def column_chunks(data_type: str, chunks: Iterable["pd.DataFrame"]) -> Iterator[ColumnChunk]:
+    """Converted columns of every non-empty DataFrame chunk of an upload."""
+    schema = CSV_SCHEMAS[data_type]
+    optional = OPTIONAL_COLUMNS.get(data_type, ())
+    for df in chunks:
+        if not df.empty:
+            yield chunk_to_columns(df, schema, optional)
+
+
+def _upsert_statement(db: Session, model, names: List[str]):
+    """Build an INSERT ... ON CONFLICT (id) DO UPDATE for the session's dialect."""
+    stmt = dialect_insert(db, model.__table__)
+    return stmt.on_conflict_do_update(
+        index_elements=[model.__table__.c.id],
+        set_={name: stmt.excluded[name] for name in names if name != "id"},
+    )
+
+
+def _existing_rows(db: Session, model, names: List[str], ids: Iterable[int]) -> dict:
+    """Current values of the rows in ``ids`` that already exist, keyed by id."""
+    ids = list(ids)
+    table = model.__table__
+    found = {}
+    for start in range(0, len(ids), _ID_LOOKUP_BATCH):
+        batch = ids[start:start + _ID_LOOKUP_BATCH]
+        rows = db.execute(select(*[table.c[name] for name in names]).where(table.c.id.in_(batch)))
+        found.update((row.id, row) for row in rows)
+    return found
+
+
+def file_fingerprint(fileobj: BinaryIO) -> str:
+    """SHA-256 of a whole uploaded file, read in blocks; leaves the file rewound."""
+    fileobj.seek(0)
+    digest = hashlib.sha256()
+    for block in iter(lambda: fileobj.read(_HASH_BLOCK_SIZE), b""):
+        digest.update(block)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def previous_upload(db: Session, data_type: str, file_hash: str, delete_missing: bool = False) -> Optional[UploadFingerprint]:
+    """
+    The stored fingerprint when this exact file was the last upload for the
+    table and nothing has written the table since; None when it must be applied.
+
+    A re-send with ``delete_missing`` only matches an earlier upload that
+    also pruned, otherwise rows missing from the file may still be stored.
+    """
+    previous = db.get(UploadFingerprint, data_type)
+    if previous is None or previous.file_hash != file_hash:
+        return None
+    if previous.table_version != table_version(db, data_type):
+        return None
+    if delete_missing and not previous.pruned:
+        return None
+    return previous
+
+
+def store_fingerprint(db: Session, data_type: str, file_hash: str, rows: int, delete_missing: bool = False) -> None:
+    """Remember the file just applied, against the table version it left behind (call after bumping)."""
+    db.merge(UploadFingerprint(
+        data_type=data_type,
+        file_hash=file_hash,
+        table_version=table_version(db, data_type),
+        pruned=delete_missing,
+        rows=rows,
+        uploaded_at=datetime.now(timezone.utc).replace(tzinfo=None),
+    ))
+
+
+def skipped_upload(previous: UploadFingerprint, elapsed: float) -> dict:
+    """Upload stats for a file skipped because it matches ``previous``."""
+    return {
+        "skipped": True,
+        "file_hash": previous.file_hash,
+        "rows_processed": 0,
+        "rows_inserted": 0,
+        "rows_updated": 0,
+        "rows_unchanged": previous.rows,
+        "rows_deleted": 0,
+        "chunks": 0,
+        "elapsed_seconds": round(elapsed, 4),
+        "rows_per_second": None,
+    }
+
+
+def _diff_rows(existing: dict, params: List[dict], names: List[str]):
+    """
+    Split a chunk into new and changed rows; rows equal to the stored ones are dropped.
+
+    Each row's fingerprint is its tuple of written values, compared with the
+    stored row under the same id. Within a chunk the last row for an id wins.
+    """
+    latest = {p["id"]: p for p in params}
+    new, changed = [], []
+    for row_id, row in latest.items():
+        old = existing.get(row_id)
+        if old is None:
+            new.append(row)
+        elif tuple(row[name] for name in names) != tuple(old):
+            changed.append(row)
+    return new, changed
+
+
+def _delete_missing(db: Session, data_type: str, seen: Set[int], changes: Optional[RollupChanges]) -> int:
+    """Delete the rows whose id was not in the upload; returns how many were removed."""
+    model = INGEST_TABLES[data_type]
+    table = model.__table__
+    missing = sorted(set(db.execute(select(table.c.id)).scalars()) - seen)
+    names = list(CSV_SCHEMAS[data_type])
+    for start in range(0, len(missing), _ID_LOOKUP_BATCH):
+        batch = missing[start:start + _ID_LOOKUP_BATCH]
+        if changes is not None:
+            old = _existing_rows(db, model, names, batch)
+            _record_changes(changes, data_type, old, [], deleted=True)
+        db.execute(delete(table).where(table.c.id.in_(batch)))
+    return len(missing)
+
+
+def _record_changes(
+    changes: RollupChanges, data_type: str, existing: dict, params: List[dict], deleted: bool = False
+) -> None:
+    """Record written rows (``params``) replacing ``existing``; with ``deleted`` the existing rows are removed."""
+    if data_type == "timesheets":
+        for old in existing.values():
+            changes.remove_timesheet(old.employee_id, old.project_id, old.hours_worked)
+        for new in params:
+            changes.add_timesheet(new["employee_id"], new["project_id"], new["hours_worked"])
+    elif data_type == "employees":
+        if deleted:
+            for old in existing.values():
+                changes.employee_changed(old.id, old.department)
+        for new in params:
+            old = existing.get(new["id"])
+            changes.employee_changed(new["id"], *([old.department] if old else []))
+    else:
+        for row_id in existing if deleted else (new["id"] for new in params):
+            changes.project_changed(row_id)
+
+
+def bulk_upsert(
+    db: Session,
+    data_type: str,
+    chunks: Iterable["pd.DataFrame"],
+    changes: Optional[RollupChanges] = None,
+    delete_missing: bool = False,
+) -> dict:
+    """
+    Upsert CSV chunks into the table for ``data_type`` using batched
+    INSERT ... ON CONFLICT DO UPDATE statements.
+
+    Each chunk is diffed against the stored rows with the same ids first and
+    only new or changed rows are written, so re-sending a mostly unchanged
+    file touches just the rows that differ. With ``delete_missing`` the rows
+    whose id does not appear in the upload are deleted afterwards.
+
+    All chunks are written inside the caller's transaction; the caller commits.
+    When ``changes`` is given, the replaced, new and deleted rows are recorded
+    in it so the analytics rollups can be brought up to date afterwards.
+
+    Returns:
+        dict: rows inserted/updated/unchanged/deleted, chunk count and throughput
+    """
+    return upsert_columns(db, data_type, column_chunks(data_type, chunks), changes, delete_missing)
+
+
+def upsert_columns(
+    db: Session,
+    data_type: str,
+    chunks: Iterable[ColumnChunk],
+    changes: Optional[RollupChanges] = None,
+    delete_missing: bool = False,
+) -> dict:
+    """``bulk_upsert`` over chunks that are already converted (e.g. parsed in another process)."""
+    model = INGEST_TABLES[data_type]
+    statements = {}
+
+    started = time.perf_counter()
+    inserted = updated = unchanged = processed = chunk_count = 0
+    # uploaded ids, collected only when delete_missing needs them
+    seen: Set[int] = set()
+    for chunk in chunks:
+        params = column_params(chunk)
+        if not params:
+            continue
+        # optional columns absent from the file are left untouched on update
+        names = chunk.names
+        if names not in statements:
+            statements[names] = _upsert_statement(db, model, list(names))
+        stmt = statements[names]
+
+        chunk_ids = set(p["id"] for p in params)
+        if delete_missing:
+            seen.update(chunk_ids)
+        existing = _existing_rows(db, model, list(names), chunk_ids)
+        new, changed = _diff_rows(existing, params, list(names))
+        inserted += len(new)
+        updated += len(changed)
+        unchanged += len(chunk_ids) - len(new) - len(changed)
+        processed += len(params)
+        chunk_count += 1
+        if not new and not changed:
+            continue
+        if changes is not None:
+            _record_changes(changes, data_type, {p["id"]: existing[p["id"]] for p in changed}, new + changed)
+        db.execute(stmt, new + changed)
+
+    deleted = 0
+    if delete_missing:
+        if not processed:
+            raise ValueError("The file has no rows; refusing to delete every stored row")
+        deleted = _delete_missing(db, data_type, seen, changes)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "rows_processed": processed,
+        "rows_inserted": inserted,
+        "rows_updated": updated,
+        "rows_unchanged": unchanged,
+        "rows_deleted": deleted,
+        "chunks": chunk_count,
+        "elapsed_seconds": round(elapsed, 4),
+        "rows_per_second": round(processed / elapsed, 1) if elapsed > 0 else None,
+    }
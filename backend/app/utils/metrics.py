@@ -0,0 +1,259 @@
+"""
+Process-local request, SQL, report and upload metrics in Prometheus text format.
+
+``MetricsMiddleware`` times every request under its route template and opens a
+per-request context that the SQLAlchemy hooks (``instrument_engine``) add
+statement counts and SQL time to, so a slow route can be split into time spent
+in the database and everything else. Statements slower than
+``SLOW_QUERY_THRESHOLD_MS`` are logged to the ``app.sql.slow`` logger.
+
+Metrics are kept per worker process; scrape each worker (or run one per pod).
+"""
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Log statements slower than this many milliseconds; 0 disables the slow-query log
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "0"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+slow_query_log = logging.getLogger("app.sql.slow")
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, *labels) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.label_names, k)} {_number(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *labels) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+        self._values: Dict[tuple, list] = {}  # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, *labels) -> None:
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[bisect_left(self.buckets, value)] += 1
+            state[-1] += value
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = self.header()
+        for labels, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(state[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status.", ("method", "route", "status")))
+http_latency = registry.register(Histogram(
+    "http_request_duration_seconds", "Request latency by route.", ("method", "route")))
+request_sql_time = registry.register(Histogram(
+    "http_request_sql_duration_seconds", "Time spent executing SQL per request.", ("method", "route")))
+request_sql_statements = registry.register(Histogram(
+    "http_request_sql_statements", "SQL statements executed per request.", ("method", "route"), COUNT_BUCKETS))
+sql_statements = registry.register(Counter(
+    "sql_statements_total", "SQL statements executed, by route (\"\" outside requests).", ("route",)))
+sql_slow_statements = registry.register(Counter(
+    "sql_slow_statements_total", "Statements slower than SLOW_QUERY_THRESHOLD_MS.", ("route",)))
+report_render_time = registry.register(Histogram(
+    "report_render_duration_seconds", "Excel/PDF report rendering time.", ("report_type",)))
+upload_rows = registry.register(Counter(
+    "upload_rows_total", "Rows processed by CSV uploads.", ("table",)))
+upload_time = registry.register(Histogram(
+    "upload_duration_seconds", "Time spent parsing and writing CSV uploads.", ("table",)))
+upload_throughput = registry.register(Gauge(
+    "upload_rows_per_second", "Throughput of the most recent upload.", ("table",)))
+
+
+def _route_label(scope) -> str:
+    # unmatched paths share one label so scanners cannot blow up cardinality
+    return getattr(scope.get("route"), "path", None) or "unmatched"
+
+
+class _RequestStats:
+    __slots__ = ("scope", "statements", "sql_seconds")
+
+    def __init__(self, scope):
+        self.scope = scope  # the router records the matched route here
+        self.statements = 0
+        self.sql_seconds = 0.0
+
+
+_current: ContextVar[Optional[_RequestStats]] = ContextVar("request_metrics", default=None)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: route latency plus the SQL the request ran."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = _RequestStats(scope)
+        token = _current.set(stats)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+            path = _route_label(scope)
+            method = scope["method"]
+            http_requests.inc(1, method, path, str(status["code"]))
+            http_latency.observe(elapsed, method, path)
+            request_sql_time.observe(stats.sql_seconds, method, path)
+            request_sql_statements.observe(stats.statements, method, path)
+
+
+# The start time lives on the statement's execution context, so a statement
+# that fails (no after_cursor_execute) leaves nothing behind on the connection.
+# Internal statements run without a context (e.g. sequence prefetch) are not timed.
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    stats = _current.get()
+    route = ""
+    if stats is not None:
+        stats.statements += 1
+        stats.sql_seconds += elapsed
+        route = _route_label(stats.scope)
+    sql_statements.inc(1, route)
+    if SLOW_QUERY_THRESHOLD_MS and elapsed * 1000 >= SLOW_QUERY_THRESHOLD_MS:
+        sql_slow_statements.inc(1, route)
+        slow_query_log.warning("slow query (%.1f ms): %s", elapsed * 1000, " ".join(statement.split()))
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count and time every statement run through ``engine`` (pass ``sync_engine`` for async engines)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def record_upload(table: str, rows: int, seconds: float) -> None:
+    upload_rows.inc(rows, table)
+    upload_time.observe(seconds, table)
+    if seconds > 0:
+        upload_throughput.set(rows / seconds, table)
+
+
+def timed_stream(chunks: Iterator[bytes], report_type: str) -> Iterator[bytes]:
+    """Yield ``chunks`` and record how long producing them took (consumer waits excluded)."""
+    rendering = 0.0
+    iterator = iter(chunks)
+    while True:
+        started = time.perf_counter()
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            break
+        finally:
+            rendering += time.perf_counter() - started
+        yield chunk
+    report_render_time.observe(rendering, report_type)
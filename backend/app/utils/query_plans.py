@@ -0,0 +1,159 @@
+"""
+Query-plan regression check for the analytics queries (SQLite).
+
+Each analytics code path is run against the database while its SQL is
+captured; every captured statement is then run through EXPLAIN QUERY PLAN.
+A plan fails the check when it reads a table with a bare ``SCAN`` (no index)
+or has SQLite build an automatic index, unless that table is expected to be
+read in full by that path (e.g. the rollup tables behind a whole snapshot).
+
+    python -m app.utils.query_plans          # exit status 1 on a regression
+    python -m app.utils.query_plans --show   # print every plan
+"""
+import argparse
+import re
+import sys
+from contextlib import contextmanager
+from datetime import date
+from typing import Callable, Dict, List, NamedTuple, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal
+
+
+class PlanCheck(NamedTuple):
+    name: str
+    run: Callable[[Session], object]
+    full_reads: Set[str] = set()  # tables this path reads entirely by design
+
+
+def _checks() -> List[PlanCheck]:
+    from app.api import analytics
+    from app.utils.rollups import RollupChanges, apply_rollup_changes, rebuild_rollups
+
+    def keyed_refresh(db: Session):
+        changes = RollupChanges()
+        changes.add_timesheet(1, 1, 1.0)
+        changes.employee_changed(1, "Engineering")
+        changes.project_changed(1)
+        apply_rollup_changes(db, changes)
+
+    month = (date(2024, 1, 1), date(2024, 1, 31))
+    return [
+        PlanCheck("snapshot", analytics.build_snapshot, {"employee_project_rollups", "projects"}),
+        PlanCheck("snapshot (period)", lambda db: analytics.build_snapshot(db, *month)),
+        PlanCheck("employee-roi", analytics.employee_roi, {"employees"}),
+        PlanCheck("project-profit", analytics.project_profit, {"project_rollups"}),
+        PlanCheck("department-summary", analytics.department_summary, {"department_rollups"}),
+        PlanCheck("overall", analytics.overall, {"project_rollups", "projects"}),
+        PlanCheck(
+            "employee-roi (top 10, department)",
+            lambda db: analytics.rollup_rows(
+                db, "employee_roi", analytics.RowQuery(order_by="-roi", limit=10, department="Engineering")
+            ),
+        ),
+        PlanCheck(
+            "project-profit (top 10)",
+            lambda db: analytics.rollup_rows(db, "project_profit", analytics.RowQuery(order_by="-profit", limit=10)),
+            {"project_rollups"},
+        ),
+        PlanCheck("employee-roi/{id}", lambda db: analytics.entity_details(db, "employee_roi", (1, 2))),
+        PlanCheck(
+            "employee-roi/{id} (period)", lambda db: analytics.entity_details(db, "employee_roi", (1, 2), month)
+        ),
+        PlanCheck("project-profit/{id}", lambda db: analytics.entity_details(db, "project_profit", (1, 2))),
+        PlanCheck(
+            "project-profit/{id} (period)", lambda db: analytics.entity_details(db, "project_profit", (1, 2), month)
+        ),
+        PlanCheck("employee-roi (live)", analytics.employee_roi_live, {"employees"}),
+        PlanCheck("project-profit (live)", analytics.project_profit_live, {"projects"}),
+        PlanCheck("department-summary (live)", analytics.department_summary_live, {"employees"}),
+        PlanCheck("overall (live)", analytics.overall_live, {"employees", "projects"}),
+        PlanCheck("rollup refresh (keyed)", keyed_refresh),
+        PlanCheck(
+            "rollup rebuild", rebuild_rollups,
+            {"employee_project_rollups", "project_rollups", "employee_rollups", "department_rollups"},
+        ),
+    ]
+
+
+@contextmanager
+def _captured(db: Session):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")):
+            statements.append((statement, parameters))
+
+    bind = db.get_bind()
+    event.listen(bind, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(bind, "before_cursor_execute", capture)
+
+
+def explain(db: Session, statement: str, parameters) -> List[str]:
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[-1] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+_BARE_SCAN = re.compile(r"^SCAN (\w+)$")
+_AUTOMATIC = re.compile(r"^SEARCH (\w+) USING AUTOMATIC")
+
+
+def regressions(plan: List[str], tables: Set[str], full_reads: Set[str]) -> List[str]:
+    """Plan lines that scan (or auto-index) a real table outside ``full_reads``."""
+    found = []
+    for line in plan:
+        match = _BARE_SCAN.match(line) or _AUTOMATIC.match(line)
+        if match and match.group(1) in tables and match.group(1) not in full_reads:
+            found.append(line)
+    return found
+
+
+def check_query_plans(db: Session, show: bool = False) -> List[str]:
+    """Explain every analytics statement; returns one message per regression."""
+    if db.get_bind().dialect.name != "sqlite":
+        raise RuntimeError("The query-plan check reads SQLite's EXPLAIN QUERY PLAN output")
+    from app.db.database import Base
+
+    checks = _checks()  # imports the models, registering every table
+    tables = set(Base.metadata.tables)
+    problems = []
+    for check in checks:
+        with _captured(db) as statements:
+            check.run(db)
+        plans: Dict[str, List[str]] = {}
+        for statement, parameters in statements:
+            plans[statement] = explain(db, statement, parameters)
+        db.rollback()
+        for statement, plan in plans.items():
+            if show:
+                print(f"-- {check.name}\n{statement.strip()}\n  " + "\n  ".join(plan) + "\n")
+            for line in regressions(plan, tables, check.full_reads):
+                problems.append(f"{check.name}: {line}")
+    return problems
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check the analytics query plans for full table scans.")
+    parser.add_argument("--show", action="store_true", help="print every captured statement and its plan")
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        problems = check_query_plans(db, show=args.show)
+    for problem in problems:
+        print(problem)
+    print("Query plans OK." if not problems else f"{len(problems)} plan regression(s).")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,188 @@
 import io
+import re
+import zipfile
 from datetime import datetime
-from typing import Dict, List, Any
-import pandas as pd
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.units import inch
+from typing import Dict, Iterator, List, Any
+from xml.sax.saxutils import escape
+
+
+# Sheet name per analytics result set, in workbook order
+EXCEL_SHEETS = [
+    ('employee_roi', 'Employee ROI'),
+    ('project_profit', 'Project Profit'),
+    ('department_summary', 'Department Summary'),
+    ('overall', 'Overall Summary'),
+]
+
+_NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+_XML_HEAD = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+# Minimal stylesheet: style 0 is the default cell, style 1 a bold header cell
+_STYLES_XML = (
+    f'{_XML_HEAD}<styleSheet xmlns="{_NS_MAIN}">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+# Characters XML 1.0 does not allow, even escaped
+_XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# Rows written between flushes of the compressed output
+_EXCEL_FLUSH_ROWS = 500
+
+
+class _ChunkSink(io.RawIOBase):
+    """Unseekable write target that hands written bytes back in chunks."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _cell_xml(ref: str, value: Any, style: int = 0) -> str:
+    style_attr = f' s="{style}"' if style else ''
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return f'<c r="{ref}" t="b"{style_attr}><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        if value != value or value in (float('inf'), float('-inf')):
+            return ''
+        return f'<c r="{ref}"{style_attr}><v>{value!r}</v></c>'
+    text = _XML_ILLEGAL.sub('', str(value))
+    space = ' xml:space="preserve"' if text != text.strip() else ''
+    return f'<c r="{ref}" t="inlineStr"{style_attr}><is><t{space}>{escape(text)}</t></is></c>'
+
+
+def _row_xml(number: int, letters: List[str], values, style: int = 0) -> str:
+    cells = ''.join(
+        _cell_xml(f'{letter}{number}', value, style) for letter, value in zip(letters, values)
+    )
+    return f'<row r="{number}">{cells}</row>'
+
+
+def _as_dict(row) -> Dict[str, Any]:
+    return row if isinstance(row, dict) else row.dict()
+
+
+def stream_excel_report(data: Dict[str, Any]) -> Iterator[bytes]:
+    """
+    Stream a multi-sheet Excel report as XLSX bytes.
+
+    Rows are written one at a time into the worksheet XML and the zip
+    output is handed out as it is compressed, so memory stays flat and the
+    first bytes are available before the workbook is complete. Result sets
+    may be lists or any iterable of dicts / pydantic models.
+
+    Args:
+        data: Dictionary containing 'employee_roi', 'project_profit', 'department_summary', 'overall'
+
+    Yields:
+        bytes: successive chunks of the Excel file content
+    """
+    sink = _ChunkSink()
+    sheet_names = []
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_DEFLATED) as workbook:
+        for key, sheet_name in EXCEL_SHEETS:
+            if key not in data:
+                continue
+            rows = [data[key]] if key == 'overall' else data[key]
+            rows = iter(rows or [])
+            first = next(rows, None)
+            if first is None:
+                continue
+
+            sheet_names.append(sheet_name)
+            path = f'xl/worksheets/sheet{len(sheet_names)}.xml'
+            with workbook.open(path, mode='w') as sheet:
+                first = _as_dict(first)
+                columns = list(first)
+                letters = [_column_letter(i) for i in range(len(columns))]
+                sheet.write(f'{_XML_HEAD}<worksheet xmlns="{_NS_MAIN}"><sheetData>'.encode())
+                sheet.write(_row_xml(1, letters, columns, style=1).encode())
+                sheet.write(_row_xml(2, letters, first.values()).encode())
+                for number, row in enumerate(rows, start=3):
+                    row = _as_dict(row)
+                    sheet.write(_row_xml(number, letters, (row.get(c) for c in columns)).encode())
+                    if number % _EXCEL_FLUSH_ROWS == 0:
+                        chunk = sink.drain()
+                        if chunk:
+                            yield chunk
+                sheet.write(b'</sheetData></worksheet>')
+            yield sink.drain()
+
+        # package parts that list the sheets are written once the sheets are known
+        sheets_xml = ''.join(
+            f'<sheet name="{escape(name)}" sheetId="{i}" r:id="rId{i}"/>'
+            for i, name in enumerate(sheet_names, start=1)
+        )
+        workbook.writestr(
+            'xl/workbook.xml',
+            f'{_XML_HEAD}<workbook xmlns="{_NS_MAIN}" xmlns:r="{_NS_REL}"><sheets>{sheets_xml}</sheets></workbook>',
+        )
+        rels_xml = ''.join(
+            f'<Relationship Id="rId{i}" Type="{_NS_REL}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+            for i in range(1, len(sheet_names) + 1)
+        )
+        rels_xml += f'<Relationship Id="rId{len(sheet_names) + 1}" Type="{_NS_REL}/styles" Target="styles.xml"/>'
+        workbook.writestr(
+            'xl/_rels/workbook.xml.rels',
+            f'{_XML_HEAD}<Relationships xmlns="{_NS_PKG_REL}">{rels_xml}</Relationships>',
+        )
+        workbook.writestr('xl/styles.xml', _STYLES_XML)
+        workbook.writestr(
+            '_rels/.rels',
+            f'{_XML_HEAD}<Relationships xmlns="{_NS_PKG_REL}">'
+            f'<Relationship Id="rId1" Type="{_NS_REL}/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>',
+        )
+        overrides = ''.join(
+            f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for i in range(1, len(sheet_names) + 1)
+        )
+        workbook.writestr(
+            '[Content_Types].xml',
+            f'{_XML_HEAD}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            f'{overrides}</Types>',
+        )
+    yield sink.drain()
 
 
 def generate_excel_report(data: Dict[str, Any]) -> bytes:
@@ -19,32 +195,7 @@ def generate_excel_report(data: Dict[str, Any]) -> bytes:
     Returns:
         bytes: Excel file content
     """
-    output = io.BytesIO()
-    
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        # Employee ROI sheet
-        if 'employee_roi' in data and data['employee_roi']:
-            df_roi = pd.DataFrame(data['employee_roi'])
-            df_roi.to_excel(writer, sheet_name='Employee ROI', index=False)
-        
-        # Project Profit sheet
-        if 'project_profit' in data and data['project_profit']:
-            df_profit = pd.DataFrame(data['project_profit'])
-            df_profit.to_excel(writer, sheet_name='Project Profit', index=False)
-        
-        # Department Summary sheet
-        if 'department_summary' in data and data['department_summary']:
-            df_dept = pd.DataFrame(data['department_summary'])
-            df_dept.to_excel(writer, sheet_name='Department Summary', index=False)
-        
-        # Overall Summary sheet
-        if 'overall' in data:
-            overall_data = data['overall']
-            df_overall = pd.DataFrame([overall_data])
-            df_overall.to_excel(writer, sheet_name='Overall Summary', index=False)
-    
-    output.seek(0)
-    return output.getvalue()
+    return b"".join(stream_excel_report(data))
 
 
 def generate_pdf_report(data: Dict[str, Any]) -> bytes:
@@ -57,6 +208,13 @@ def generate_pdf_report(data: Dict[str, Any]) -> bytes:
     Returns:
         bytes: PDF file content
     """
+    # reportlab is only needed here; importing it lazily keeps API startup fast
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
+
     output = io.BytesIO()
     doc = SimpleDocTemplate(output, pagesize=letter)
     styles = getSampleStyleSheet()
@@ -120,7 +278,8 @@ def generate_pdf_report(data: Dict[str, Any]) -> bytes:
     if 'employee_roi' in data and data['employee_roi']:
         story.append(Paragraph("Top Employees by ROI", heading_style))
         
-        # Sort employees by ROI (descending) and take top 5
+        # Sort employees by ROI (descending) and take top 5; the API already
+        # passes only the top rows (see reports.PDF_TOP_EMPLOYEES)
         employees = sorted(data['employee_roi'], 
                          key=lambda x: x.get('roi', 0) if x.get('roi') else 0, 
                          reverse=True)[:5]
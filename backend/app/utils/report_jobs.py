@@ -0,0 +1,236 @@
+"""
+Background report rendering.
+
+Excel/PDF rendering runs in a bounded process pool so CPU-heavy reportlab
+work never occupies the request threadpool. Finished artifacts are kept on
+local disk for a TTL. Job ids are derived from (report type, data version,
+period), so identical requests against the same data share one job and one file, and
+any worker can serve an artifact another worker rendered.
+"""
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from app.utils.metrics import report_render_time
+
+REPORT_JOB_DIR = Path(os.getenv("REPORT_JOB_DIR", "./report_artifacts"))
+REPORT_JOB_TTL = float(os.getenv("REPORT_JOB_TTL", "3600"))
+REPORT_JOB_WORKERS = int(os.getenv("REPORT_JOB_WORKERS", "2"))
+
+REPORT_FORMATS = {
+    "excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "pdf": ("pdf", "application/pdf"),
+}
+
+
+def _render_report(report_type: str, data: Dict[str, Any], path: str) -> float:
+    """Runs in a pool process: render the report, move it into place atomically and return the render time."""
+    from app.utils.report_generator import generate_pdf_report, stream_excel_report
+
+    started = time.perf_counter()
+    partial = f"{path}.{os.getpid()}.part"
+    with open(partial, "wb") as out:
+        if report_type == "excel":
+            for chunk in stream_excel_report(data):
+                out.write(chunk)
+        else:
+            out.write(generate_pdf_report(data))
+    os.replace(partial, path)
+    return time.perf_counter() - started
+
+
+@dataclass
+class ReportJob:
+    id: str
+    report_type: str
+    data_version: str
+    path: Path
+    period: str = ""
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    future: Optional[Future] = None
+    # resolved once the job has finished (done or failed); exists before the render is submitted
+    completed: Future = field(default_factory=Future, repr=False)
+
+    @property
+    def status(self) -> str:
+        if self.error is not None:
+            return "failed"
+        # finished_at is published last (see _on_done), so a done job always has its timestamps
+        if self.finished_at is not None:
+            return "done"
+        if self.future is not None and self.future.running():
+            return "running"
+        return "queued"
+
+    def finish(self, error: Optional[str] = None, finished_at: Optional[float] = None) -> None:
+        """Record the outcome and release everyone waiting on ``completed``."""
+        self.error = error
+        # set after error: status reads "done" as soon as finished_at is set
+        self.finished_at = finished_at or time.time()
+        self.completed.set_result(None)
+
+    @property
+    def expires_at(self) -> Optional[float]:
+        return self.finished_at + REPORT_JOB_TTL if self.finished_at else None
+
+    @property
+    def media_type(self) -> str:
+        return REPORT_FORMATS[self.report_type][1]
+
+    @property
+    def filename(self) -> str:
+        stamp = datetime.fromtimestamp(self.finished_at or self.created_at).strftime("%Y%m%d_%H%M%S")
+        return f"analytics_report_{stamp}.{REPORT_FORMATS[self.report_type][0]}"
+
+    def to_dict(self) -> dict:
+        def iso(ts):
+            return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat() if ts else None
+
+        return {
+            "job_id": self.id,
+            "report_type": self.report_type,
+            "status": self.status,
+            "data_version": self.data_version,
+            "period": self.period or None,
+            "created_at": iso(self.created_at),
+            "finished_at": iso(self.finished_at),
+            "expires_at": iso(self.expires_at),
+            "error": self.error,
+        }
+
+
+def job_id_for(report_type: str, data_version: str, period: str = "") -> str:
+    return hashlib.blake2b(f"{report_type}|{data_version}|{period}".encode(), digest_size=10).hexdigest()
+
+
+class ReportJobManager:
+    """Submits, tracks, dedupes and expires report jobs for this worker."""
+
+    def __init__(self, directory: Path = REPORT_JOB_DIR, workers: int = REPORT_JOB_WORKERS):
+        self.directory = directory
+        self.workers = workers
+        self._jobs: Dict[str, ReportJob] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: never fork a process that holds DB connections and threads
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def _submit(self, *args) -> Future:
+        """Submit to the pool; a pool broken by a dead worker is replaced and the submit retried once."""
+        pool = self._executor()
+        try:
+            return pool.submit(*args)
+        except BrokenProcessPool:
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+            return self._executor().submit(*args)
+
+    def _path(self, report_type: str, job_id: str) -> Path:
+        return self.directory / f"{job_id}.{REPORT_FORMATS[report_type][0]}"
+
+    def _on_done(self, job: ReportJob, future: Future) -> None:
+        finished_at = time.time()
+        error = None
+        if future.cancelled():
+            error = "cancelled"
+        elif future.exception() is not None:
+            exception = future.exception()
+            error = str(exception) or exception.__class__.__name__
+        else:
+            report_render_time.observe(future.result(), job.report_type)
+        job.finish(error, finished_at)
+
+    def find(self, job_id: str) -> Optional[ReportJob]:
+        """Look up a job, including artifacts rendered by another worker."""
+        self.purge_expired()
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        for report_type in REPORT_FORMATS:
+            path = self._path(report_type, job_id)
+            if path.exists():
+                mtime = path.stat().st_mtime
+                job = ReportJob(job_id, report_type, "", path, created_at=mtime)
+                job.finish(finished_at=mtime)
+                return job
+        return None
+
+    def submit(
+        self,
+        report_type: str,
+        data_version: str,
+        load_data: Callable[[], Dict[str, Any]],
+        period: str = "",
+    ) -> ReportJob:
+        """
+        Queue a render, or return the existing job for the same report, data version and period.
+
+        ``load_data`` is only called when a new job is actually started. If it
+        or the pool raises, the returned job has already failed.
+        """
+        job_id = job_id_for(report_type, data_version, period)
+        existing = self.find(job_id)
+        if existing is not None and existing.status != "failed":
+            return existing
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            # a concurrent request may have started the same job meanwhile
+            existing = self._jobs.get(job_id)
+            if existing is not None and existing.status != "failed":
+                return existing
+            job = ReportJob(job_id, report_type, data_version, self._path(report_type, job_id), period)
+            self._jobs[job_id] = job
+        try:
+            job.future = self._submit(_render_report, report_type, load_data(), str(job.path))
+        except Exception as error:
+            # the job is already published: fail it, so it expires and a retry starts a new one
+            job.finish(str(error) or error.__class__.__name__)
+            return job
+        job.future.add_done_callback(lambda future: self._on_done(job, future))
+        return job
+
+    def purge_expired(self) -> None:
+        """Drop finished jobs and artifact files older than the TTL."""
+        now = time.time()
+        with self._lock:
+            for job_id, job in list(self._jobs.items()):
+                if job.expires_at is not None and job.expires_at < now:
+                    del self._jobs[job_id]
+        if not self.directory.exists():
+            return
+        for path in self.directory.iterdir():
+            try:
+                if path.stat().st_mtime + REPORT_JOB_TTL < now:
+                    path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+report_jobs = ReportJobManager()
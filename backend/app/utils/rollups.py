@@ -0,0 +1,354 @@
+"""
+Incrementally maintained analytics rollups.
+
+Write paths describe what they touched with a ``RollupChanges`` and call
+``apply_rollup_changes`` before committing; only the affected rollup rows
+are recomputed. Run ``python -m app.utils.rollups rebuild|check`` to rebuild
+every rollup from the timesheets or to compare them with the live queries.
+"""
+import argparse
+import math
+import sys
+from collections import defaultdict
+from typing import Iterable, Optional, Set
+
+from sqlalchemy import case, delete, func, or_, select, true, update
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal, dialect_insert
+from app.models.employee import Employee
+from app.models.project import Project
+from app.models.timesheet import Timesheet
+from app.models.rollup import (
+    DepartmentRollup,
+    EmployeeProjectRollup,
+    EmployeeRollup,
+    ProjectRollup,
+)
+
+employees = Employee.__table__
+projects = Project.__table__
+timesheets = Timesheet.__table__
+pairs = EmployeeProjectRollup.__table__
+project_rollups = ProjectRollup.__table__
+employee_rollups = EmployeeRollup.__table__
+department_rollups = DepartmentRollup.__table__
+
+# Past this many touched keys a refresh recomputes the whole table instead
+MAX_KEYED_REFRESH = 500
+
+
+class RollupChanges:
+    """Collects the keys a write touched so derived rows are refreshed once per transaction."""
+
+    def __init__(self):
+        # (employee_id, project_id) -> [entries delta, hours delta]
+        self.pair_deltas = defaultdict(lambda: [0, 0.0])
+        self.employee_ids: Set[int] = set()
+        self.project_ids: Set[int] = set()
+        self.departments: Set[Optional[str]] = set()
+
+    def add_timesheet(self, employee_id, project_id, hours, sign=1):
+        if employee_id is None or project_id is None:
+            return
+        delta = self.pair_deltas[(employee_id, project_id)]
+        delta[0] += sign
+        delta[1] += sign * float(hours or 0.0)
+
+    def remove_timesheet(self, employee_id, project_id, hours):
+        self.add_timesheet(employee_id, project_id, hours, sign=-1)
+
+    def employee_changed(self, employee_id, *old_departments):
+        """An employee was created, updated or deleted; pass its department(s) before the write."""
+        self.employee_ids.add(employee_id)
+        self.departments.update(old_departments)
+
+    def project_changed(self, project_id):
+        self.project_ids.add(project_id)
+
+    def __bool__(self):
+        return bool(self.pair_deltas or self.employee_ids or self.project_ids or self.departments)
+
+
+def _cap(keys: Optional[Set]) -> Optional[Set]:
+    """None means "every row"; large key sets are cheaper to refresh as a whole."""
+    if keys is None or len(keys) > MAX_KEYED_REFRESH:
+        return None
+    return keys
+
+
+def _union(*key_sets: Optional[Set]) -> Optional[Set]:
+    if any(keys is None for keys in key_sets):
+        return None
+    return _cap(set().union(*key_sets))
+
+
+def _keyed(column, keys: Optional[Iterable]):
+    if keys is None:
+        return true()
+    keys = set(keys)
+    values = [key for key in keys if key is not None]
+    if None in keys:
+        return or_(column.in_(values), column.is_(None))
+    return column.in_(values)
+
+
+def _related(db: Session, out_column, in_column, keys: Optional[Set], source) -> Optional[Set]:
+    """Distinct ``out_column`` values of ``source`` rows whose ``in_column`` is in ``keys``."""
+    if keys is None:
+        return None
+    if not keys:
+        return set()
+    rows = db.execute(select(out_column).distinct().select_from(source).where(_keyed(in_column, keys)))
+    return _cap(set(rows.scalars()))
+
+
+def _apply_pair_deltas(db: Session, pair_deltas) -> None:
+    params = [
+        {"employee_id": e, "project_id": p, "entries": n, "total_hours": h, "total_cost": 0.0}
+        for (e, p), (n, h) in pair_deltas.items()
+        if n or h
+    ]
+    if not params:
+        return
+    stmt = dialect_insert(db, pairs)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[pairs.c.employee_id, pairs.c.project_id],
+        set_={
+            "entries": pairs.c.entries + stmt.excluded.entries,
+            "total_hours": pairs.c.total_hours + stmt.excluded.total_hours,
+        },
+    )
+    db.execute(stmt, params)
+    touched = _cap({p["employee_id"] for p in params})
+    db.execute(delete(pairs).where(pairs.c.entries <= 0, _keyed(pairs.c.employee_id, touched)))
+
+
+def _refresh_pair_costs(db: Session, employee_ids: Optional[Set]) -> None:
+    if employee_ids is not None and not employee_ids:
+        return
+    rate = select(employees.c.hourly_rate).where(employees.c.id == pairs.c.employee_id).scalar_subquery()
+    db.execute(
+        update(pairs)
+        .where(_keyed(pairs.c.employee_id, employee_ids))
+        .values(total_cost=pairs.c.total_hours * func.coalesce(rate, 0.0))
+    )
+
+
+def _replace(db: Session, table, key_column, keys: Optional[Set], query) -> None:
+    """Swap the rollup rows for ``keys`` with the rows produced by ``query``."""
+    if keys is not None and not keys:
+        return
+    db.execute(delete(table).where(_keyed(key_column, keys)))
+    columns = [column.name for column in query.selected_columns]
+    db.execute(table.insert().from_select(columns, query))
+
+
+def _refresh_projects(db: Session, project_ids: Optional[Set]) -> None:
+    known = employees.c.id.isnot(None)
+    query = (
+        select(
+            pairs.c.project_id.label("project_id"),
+            func.sum(case((known, pairs.c.entries), else_=0)).label("entries"),
+            func.sum(pairs.c.total_hours).label("allocation_hours"),
+            func.sum(case((known, pairs.c.total_hours), else_=0.0)).label("total_hours"),
+            func.sum(pairs.c.total_cost).label("total_cost"),
+        )
+        .select_from(pairs.outerjoin(employees, employees.c.id == pairs.c.employee_id))
+        .where(_keyed(pairs.c.project_id, project_ids))
+        .group_by(pairs.c.project_id)
+    )
+    _replace(db, project_rollups, project_rollups.c.project_id, project_ids, query)
+
+
+def _refresh_employees(db: Session, employee_ids: Optional[Set]) -> None:
+    revenue = (pairs.c.total_hours / project_rollups.c.allocation_hours) * projects.c.revenue
+    query = (
+        select(
+            employees.c.id.label("employee_id"),
+            func.sum(pairs.c.total_hours).label("total_hours"),
+            func.sum(pairs.c.total_cost).label("total_cost"),
+            func.coalesce(func.sum(revenue), 0.0).label("total_revenue"),
+        )
+        .select_from(
+            pairs.join(employees, employees.c.id == pairs.c.employee_id)
+            .join(projects, projects.c.id == pairs.c.project_id)
+            .join(project_rollups, project_rollups.c.project_id == pairs.c.project_id)
+        )
+        .where(_keyed(employees.c.id, employee_ids))
+        .group_by(employees.c.id)
+    )
+    _replace(db, employee_rollups, employee_rollups.c.employee_id, employee_ids, query)
+
+
+def _refresh_departments(db: Session, departments: Optional[Set]) -> None:
+    query = (
+        select(
+            employees.c.department.label("department"),
+            func.sum(employee_rollups.c.total_hours).label("total_hours"),
+            func.sum(employee_rollups.c.total_cost).label("total_cost"),
+            func.sum(employee_rollups.c.total_revenue).label("total_revenue"),
+        )
+        .select_from(employee_rollups.join(employees, employees.c.id == employee_rollups.c.employee_id))
+        .where(_keyed(employees.c.department, departments))
+        .group_by(employees.c.department)
+    )
+    _replace(db, department_rollups, department_rollups.c.department, departments, query)
+
+
+def apply_rollup_changes(db: Session, changes: RollupChanges) -> None:
+    """Bring the rollups in line with the writes described by ``changes`` (caller commits)."""
+    if not changes:
+        return
+    # the refreshes below are plain SQL, so pending ORM writes must be visible
+    db.flush()
+    _apply_pair_deltas(db, changes.pair_deltas)
+
+    pair_employees = _cap({e for e, _ in changes.pair_deltas})
+    pair_projects = _cap({p for _, p in changes.pair_deltas})
+    changed_employees = _cap(set(changes.employee_ids))
+
+    # hours * rate changes for new pairs and for employees whose rate may have changed
+    cost_employees = _union(pair_employees, changed_employees)
+    _refresh_pair_costs(db, cost_employees)
+
+    # every revenue share on a project moves when its hours or revenue change
+    share_projects = _union(pair_projects, _cap(set(changes.project_ids)))
+    employee_projects = _related(db, pairs.c.project_id, pairs.c.employee_id, changed_employees, pairs)
+    _refresh_projects(db, _union(share_projects, employee_projects))
+
+    share_employees = _related(db, pairs.c.employee_id, pairs.c.project_id, share_projects, pairs)
+    refreshed_employees = _union(cost_employees, share_employees)
+    _refresh_employees(db, refreshed_employees)
+
+    departments = _related(db, employees.c.department, employees.c.id, refreshed_employees, employees)
+    if departments is not None:
+        departments |= changes.departments
+    _refresh_departments(db, departments)
+
+
+def rebuild_rollups(db: Session) -> None:
+    """Recompute every rollup table from the timesheets (caller commits)."""
+    for table in (department_rollups, employee_rollups, project_rollups, pairs):
+        db.execute(delete(table))
+    query = (
+        select(
+            timesheets.c.employee_id,
+            timesheets.c.project_id,
+            func.count().label("entries"),
+            func.sum(timesheets.c.hours_worked).label("total_hours"),
+            func.sum(0.0).label("total_cost"),
+        )
+        .where(timesheets.c.employee_id.isnot(None), timesheets.c.project_id.isnot(None))
+        .group_by(timesheets.c.employee_id, timesheets.c.project_id)
+    )
+    db.execute(pairs.insert().from_select([c.name for c in query.selected_columns], query))
+    _refresh_pair_costs(db, None)
+    _refresh_projects(db, None)
+    _refresh_employees(db, None)
+    _refresh_departments(db, None)
+
+
+def ensure_rollups(db: Session) -> None:
+    """Build the rollups once for databases that have timesheets but no rollup rows yet."""
+    has_timesheets = db.execute(select(timesheets.c.id).limit(1)).first() is not None
+    has_rollups = db.execute(select(pairs.c.employee_id).limit(1)).first() is not None
+    if has_timesheets and not has_rollups:
+        rebuild_rollups(db)
+        db.commit()
+
+
+def _same(a, b) -> bool:
+    if isinstance(a, float) or isinstance(b, float):
+        if a is None or b is None:
+            return a is b
+        return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
+    return a == b
+
+
+def _compare(name: str, key: str, rollup_rows, live_rows) -> list:
+    rollup = {row[key]: row for row in rollup_rows}
+    live = {row[key]: row for row in live_rows}
+    problems = [f"{name}: {key}={k} missing from rollups" for k in live.keys() - rollup.keys()]
+    problems += [f"{name}: {key}={k} not in live results" for k in rollup.keys() - live.keys()]
+    for k in rollup.keys() & live.keys():
+        for field, value in live[k].items():
+            if not _same(rollup[k][field], value):
+                problems.append(f"{name}: {key}={k} {field} rollup={rollup[k][field]!r} live={value!r}")
+    return problems
+
+
+def check_rollups(db: Session) -> list:
+    """
+    Compare rollup-backed analytics, the SQL snapshot and (when NumPy is
+    installed) the columnar engine with the live timesheet queries; returns mismatches.
+    """
+    from app.api import analytics
+    from app.utils import columnar
+    from app.utils.cache import get_data_version
+
+    def dump(rows):
+        return [row.dict() for row in rows]
+
+    problems = []
+    problems += _compare(
+        "employee-roi", "employee_id",
+        dump(analytics.employee_roi(db)), dump(analytics.employee_roi_live(db)),
+    )
+    problems += _compare(
+        "project-profit", "project_id",
+        dump(analytics.project_profit(db)), dump(analytics.project_profit_live(db)),
+    )
+    problems += _compare(
+        "department-summary", "department",
+        dump(analytics.department_summary(db)), dump(analytics.department_summary_live(db)),
+    )
+    problems += _compare(
+        "overall", "key",
+        [{"key": "overall", **analytics.overall(db)}], [{"key": "overall", **analytics.overall_live(db)}],
+    )
+
+    snapshots = {"snapshot": analytics.build_snapshot(db)}
+    if columnar.NUMPY_AVAILABLE:
+        snapshots["numpy"] = columnar.columnar_snapshot(db, get_data_version(db))
+    for label, snapshot in snapshots.items():
+        problems += _compare(
+            f"{label} employee-roi", "employee_id",
+            dump(snapshot.employee_roi), dump(analytics.employee_roi_live(db)),
+        )
+        problems += _compare(
+            f"{label} project-profit", "project_id",
+            dump(snapshot.project_profit), dump(analytics.project_profit_live(db)),
+        )
+        problems += _compare(
+            f"{label} department-summary", "department",
+            dump(snapshot.department_summary), dump(analytics.department_summary_live(db)),
+        )
+        problems += _compare(
+            f"{label} overall", "key",
+            [{"key": "overall", **snapshot.overall}], [{"key": "overall", **analytics.overall_live(db)}],
+        )
+    return problems
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Maintain the analytics rollup tables.")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        if args.command == "rebuild":
+            rebuild_rollups(db)
+            db.commit()
+            print("Rollups rebuilt.")
+            return 0
+
+        problems = check_rollups(db)
+        for problem in problems:
+            print(problem)
+        print("Rollups consistent." if not problems else f"{len(problems)} mismatch(es).")
+        return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
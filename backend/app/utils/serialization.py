@@ -0,0 +1,81 @@
+"""
+Fast JSON encoding for analytics and export responses.
+
+Response rows are flat pydantic models holding plain ints, floats and strings,
+so they are encoded straight from their field values instead of going through
+``jsonable_encoder``. orjson is used when installed (optional dependency) and
+the standard json module otherwise; both produce the same document.
+"""
+import gzip
+from datetime import date, datetime
+from operator import attrgetter
+from typing import Any, Iterable, Type
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+RESPONSE_FORMATS = ("json", "columnar")
+
+
+def _default(value: Any):
+    if isinstance(value, BaseModel):
+        # field name -> value, without per-field encoding
+        return vars(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    def dumps(value: Any) -> bytes:
+        """Encode ``value`` (plain data and pydantic models) as compact UTF-8 JSON."""
+        return orjson.dumps(value, default=_default)
+else:  # pragma: no cover - exercised without orjson
+    import json
+
+    def dumps(value: Any) -> bytes:
+        """Encode ``value`` (plain data and pydantic models) as compact UTF-8 JSON."""
+        return json.dumps(value, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def field_names(model: Type[BaseModel]) -> list:
+    fields = getattr(model, "model_fields", None)
+    return list(fields if fields is not None else model.__fields__)
+
+
+def columnar(rows: Iterable[BaseModel], model: Type[BaseModel]) -> dict:
+    """
+    ``{"columns": [...], "data": [[...], ...]}``: the field names once, then one array per row.
+
+    Only ``model``'s fields are included, so rows of a subclass (such as rows
+    carrying a breakdown) keep the same columns.
+    """
+    columns = field_names(model)
+    values = attrgetter(*columns)
+    return {"columns": columns, "data": [list(values(row)) for row in rows]}
+
+
+def gzip_body(body: bytes, level: int = 6) -> bytes:
+    # mtime=0 keeps the output stable for the same body
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows gzip (``gzip;q=0`` does not)."""
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            quality = params.strip().removeprefix("q=")
+            return not params or _positive(quality)
+    return False
+
+
+def _positive(quality: str) -> bool:
+    try:
+        return float(quality) > 0
+    except ValueError:
+        return True
@@ -0,0 +1,83 @@
+"""Helpers shared by the benchmark scripts: a throwaway server and latency statistics."""
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+class Server(NamedTuple):
+    base_url: str
+    process: subprocess.Popen
+    workdir: Path
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def running_server(env: Optional[Dict[str, str]] = None) -> Iterator[Server]:
+    """Start uvicorn on a free port with an empty database in a temporary directory."""
+    workdir = Path(tempfile.mkdtemp(prefix="dashboard-bench-"))
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir,
+        env={**os.environ, "PYTHONPATH": str(BACKEND_DIR), "REPORT_JOB_DIR": str(workdir / "reports"), **(env or {})},
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(300):
+            try:
+                httpx.get(f"{base_url}/health")
+                break
+            except httpx.TransportError:
+                if process.poll() is not None:
+                    raise RuntimeError("server exited during startup")
+                time.sleep(0.1)
+        yield Server(base_url, process, workdir)
+    finally:
+        process.terminate()
+        process.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def latency_summary(latencies_ms: List[float]) -> dict:
+    if not latencies_ms:
+        return {"requests": 0}
+    return {
+        "requests": len(latencies_ms),
+        "p50_ms": round(statistics.median(latencies_ms), 2),
+        "p99_ms": round(percentile(latencies_ms, 99), 2),
+        "max_ms": round(max(latencies_ms), 2),
+        "requests_per_second": round(1000 * len(latencies_ms) / sum(latencies_ms), 1) if sum(latencies_ms) else None,
+    }
+
+
+def peak_rss_mb(pid: int) -> Optional[float]:
+    """Peak resident set size of ``pid`` (Linux /proc), in MiB."""
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
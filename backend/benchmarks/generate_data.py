@@ -0,0 +1,122 @@
+"""
+Seeded synthetic data in the upload CSV format.
+
+Distributions are meant to look like a real company rather than uniform noise:
+department sizes and pay bands differ, project revenue is log-normal, a few
+projects and a few people account for most of the booked hours (Zipf-like
+weights), entry lengths cluster around a working day's share, and work dates
+fall on weekdays. The same seed always produces byte-identical files.
+
+    cd backend && python -m benchmarks.generate_data --timesheets 1000000 --out /tmp/bench-data
+"""
+import argparse
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# department -> (share of employees, median hourly rate)
+DEPARTMENTS = {
+    "Engineering": (0.38, 72.0),
+    "Sales": (0.16, 48.0),
+    "Marketing": (0.12, 45.0),
+    "Operations": (0.14, 38.0),
+    "Finance": (0.08, 55.0),
+    "Support": (0.12, 30.0),
+}
+CHUNK_ROWS = 1_000_000
+
+
+def _zipf_weights(rng: np.random.Generator, n: int, exponent: float) -> np.ndarray:
+    """Normalised 1/rank**exponent weights, randomly assigned to the n ids."""
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    rng.shuffle(weights)
+    return weights / weights.sum()
+
+
+def _business_days(start: date, days: int) -> np.ndarray:
+    calendar = np.arange(np.datetime64(start), np.datetime64(start + timedelta(days=days)))
+    return calendar[np.is_busday(calendar)]
+
+
+def write_employees(rng: np.random.Generator, count: int, path: Path) -> None:
+    names = list(DEPARTMENTS)
+    shares = np.array([DEPARTMENTS[name][0] for name in names])
+    department = rng.choice(len(names), size=count, p=shares / shares.sum())
+    median_rate = np.array([DEPARTMENTS[name][1] for name in names])[department]
+    rate = np.round(median_rate * rng.lognormal(0.0, 0.25, size=count), 2)
+    pd.DataFrame({
+        "id": np.arange(1, count + 1),
+        "name": [f"Employee {i}" for i in range(1, count + 1)],
+        "department": np.array(names)[department],
+        "hourly_rate": rate,
+    }).to_csv(path, index=False)
+
+
+def write_projects(rng: np.random.Generator, count: int, path: Path) -> None:
+    pd.DataFrame({
+        "id": np.arange(1, count + 1),
+        "name": [f"Project {i}" for i in range(1, count + 1)],
+        "revenue": np.round(rng.lognormal(np.log(150_000), 1.0, size=count), 2),
+    }).to_csv(path, index=False)
+
+
+def write_timesheets(
+    rng: np.random.Generator, count: int, employees: int, projects: int, start: date, days: int, path: Path
+) -> None:
+    project_weights = _zipf_weights(rng, projects, 1.1)
+    employee_weights = _zipf_weights(rng, employees, 0.6)
+    workdays = _business_days(start, days)
+    with open(path, "w", newline="") as out:
+        out.write("id,employee_id,project_id,hours_worked,work_date\n")
+        for first in range(0, count, CHUNK_ROWS):
+            size = min(CHUNK_ROWS, count - first)
+            # entries cluster around 4h, in quarter hours between 0.25h and 12h
+            hours = np.clip(np.round(rng.gamma(4.0, 1.0, size=size) * 4) / 4, 0.25, 12.0)
+            pd.DataFrame({
+                "id": np.arange(first + 1, first + size + 1),
+                "employee_id": rng.choice(employees, size=size, p=employee_weights) + 1,
+                "project_id": rng.choice(projects, size=size, p=project_weights) + 1,
+                "hours_worked": hours,
+                "work_date": workdays[rng.integers(0, len(workdays), size=size)],
+            }).to_csv(out, index=False, header=False)
+
+
+def generate(
+    out: Path,
+    employees: int = 10_000,
+    projects: int = 2_000,
+    timesheets: int = 1_000_000,
+    seed: int = 42,
+    start: date = date(2024, 1, 1),
+    days: int = 365,
+) -> dict:
+    """Write employees.csv, projects.csv and timesheets.csv into ``out``; returns their paths."""
+    out.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    paths = {name: out / f"{name}.csv" for name in ("employees", "projects", "timesheets")}
+    write_employees(rng, employees, paths["employees"])
+    write_projects(rng, projects, paths["projects"])
+    write_timesheets(rng, timesheets, employees, projects, start, days, paths["timesheets"])
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--out", type=Path, required=True)
+    parser.add_argument("--employees", type=int, default=10_000)
+    parser.add_argument("--projects", type=int, default=2_000)
+    parser.add_argument("--timesheets", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--start", type=date.fromisoformat, default=date(2024, 1, 1))
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    paths = generate(args.out, args.employees, args.projects, args.timesheets, args.seed, args.start, args.days)
+    for name, path in paths.items():
+        print(f"{name}: {path} ({path.stat().st_size / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+End-to-end benchmark harness.
+
+For each scale (number of timesheets) it generates seeded data, starts a fresh
+server on an empty database and measures:
+
+* each CSV upload (wall time and rows/s),
+* every /analytics/* endpoint: the first (cold) request, then warm p50/p99,
+* /report/excel and /report/pdf,
+* the list endpoints: first page, and a full NDJSON export of the timesheets,
+* the server's peak RSS.
+
+Results are written as JSON so runs on different commits can be diffed.
+
+    cd backend && python -m benchmarks.run --scales 10000,100000,1000000 --output bench.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from benchmarks.common import BACKEND_DIR, latency_summary, peak_rss_mb, running_server
+from benchmarks.generate_data import generate
+
+ANALYTICS_ENDPOINTS = [
+    "/analytics/employee-roi",
+    "/analytics/project-profit",
+    "/analytics/department-summary",
+    "/analytics/overall",
+    "/analytics/employee-roi?engine=numpy",
+    "/analytics/employee-roi?format=columnar",
+    "/analytics/employee-roi?start=2024-03-01&end=2024-03-31",
+]
+REPORT_ENDPOINTS = ["/report/excel", "/report/pdf"]
+LIST_ENDPOINTS = ["/employees/?limit=1000", "/projects/?limit=1000", "/timesheets/?limit=1000"]
+
+
+def _timed(client: httpx.Client, method: str, url: str, **kwargs):
+    started = time.perf_counter()
+    response = client.request(method, url, **kwargs)
+    response.raise_for_status()
+    return response, (time.perf_counter() - started) * 1000
+
+
+def _measure(client: httpx.Client, url: str, repeat: int) -> dict:
+    """Cold first request, then ``repeat`` warm ones."""
+    _, cold = _timed(client, "GET", url)
+    warm = [_timed(client, "GET", url)[1] for _ in range(repeat)]
+    return {"cold_ms": round(cold, 2), **latency_summary(warm)}
+
+
+def _upload(client: httpx.Client, data_type: str, path: Path) -> dict:
+    with open(path, "rb") as handle:
+        response, elapsed = _timed(client, "POST", f"/upload/{data_type}", files={"file": (path.name, handle)})
+    body = response.json()
+    return {
+        "rows": body["rows_processed"],
+        "seconds": round(elapsed / 1000, 3),
+        "rows_per_second": round(body["rows_processed"] / (elapsed / 1000), 1),
+        "server_rows_per_second": body.get("rows_per_second"),
+    }
+
+
+def _ndjson_export(client: httpx.Client) -> dict:
+    rows = 0
+    started = time.perf_counter()
+    with client.stream("GET", "/timesheets/", headers={"Accept": "application/x-ndjson"}) as response:
+        for line in response.iter_lines():
+            rows += bool(line)
+    elapsed = time.perf_counter() - started
+    return {"rows": rows, "seconds": round(elapsed, 3), "rows_per_second": round(rows / elapsed, 1)}
+
+
+def run_scale(timesheets: int, args, data_root: Path) -> dict:
+    paths = generate(
+        data_root / str(timesheets), args.employees, args.projects, timesheets, args.seed
+    )
+    result = {"timesheets": timesheets, "employees": args.employees, "projects": args.projects}
+    with running_server() as server, httpx.Client(base_url=server.base_url, timeout=3600) as client:
+        result["upload"] = {name: _upload(client, name, path) for name, path in paths.items()}
+        result["analytics"] = {url: _measure(client, url, args.repeat) for url in ANALYTICS_ENDPOINTS}
+        result["reports"] = {url: _measure(client, url, args.report_repeat) for url in REPORT_ENDPOINTS}
+        result["lists"] = {url: _measure(client, url, args.repeat) for url in LIST_ENDPOINTS}
+        result["lists"]["/timesheets/ (ndjson export)"] = _ndjson_export(client)
+        result["server_peak_rss_mb"] = peak_rss_mb(server.process.pid)
+    return result
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", default="10000,100000,1000000", help="comma-separated timesheet counts")
+    parser.add_argument("--employees", type=int, default=10_000)
+    parser.add_argument("--projects", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=20, help="warm requests per endpoint")
+    parser.add_argument("--report-repeat", type=int, default=3, help="warm requests per report")
+    parser.add_argument("--data-dir", type=Path, help="keep generated CSVs here (default: temporary)")
+    parser.add_argument("--output", type=Path, help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="dashboard-data-") as scratch:
+        data_root = args.data_dir or Path(scratch)
+        report = {
+            "commit": _commit(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "scales": [run_scale(int(scale), args, data_root) for scale in args.scales.split(",")],
+        }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Worker startup benchmark.
+
+Imports ``app.main`` in fresh interpreters under ``python -X importtime`` and
+reports the median import time of the app and of the slowest modules, plus
+which heavy libraries (pandas, numpy, reportlab, alembic) were loaded at
+import. It then times how long a uvicorn worker takes to answer /health, with
+and without the startup migration step (``DB_AUTO_MIGRATE``).
+
+    cd backend && python -m benchmarks.startup --runs 5 --top 25
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.common import BACKEND_DIR, running_server
+
+HEAVY_MODULES = ("pandas", "numpy", "reportlab", "openpyxl", "alembic", "pyarrow")
+
+_PROBE = (
+    "import json, sys; import app.main; "
+    f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+)
+
+
+def _import_once(database_url: str) -> tuple:
+    """One fresh interpreter: ({module: (self_us, cumulative_us)}, heavy modules loaded)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "DATABASE_URL": database_url, "PYTHONWARNINGS": "ignore"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def import_times(runs: int, top: int) -> dict:
+    with tempfile.TemporaryDirectory(prefix="dashboard-startup-") as scratch:
+        database_url = f"sqlite:///{Path(scratch) / 'startup.db'}"
+        samples: Dict[str, List[tuple]] = defaultdict(list)
+        heavy = set()
+        for _ in range(runs):
+            timings, loaded = _import_once(database_url)
+            heavy.update(loaded)
+            for name, value in timings.items():
+                samples[name].append(value)
+
+    def median_ms(name: str, column: int) -> float:
+        return round(statistics.median(value[column] for value in samples[name]) / 1000, 2)
+
+    slowest = sorted(samples, key=lambda name: median_ms(name, 1), reverse=True)[:top]
+    return {
+        "app_main_ms": median_ms("app.main", 1),
+        "heavy_modules_loaded": sorted(heavy),
+        "modules": [
+            {"module": name, "self_ms": median_ms(name, 0), "cumulative_ms": median_ms(name, 1)}
+            for name in slowest
+        ],
+        "app_modules": [
+            {"module": name, "self_ms": median_ms(name, 0), "cumulative_ms": median_ms(name, 1)}
+            for name in sorted(samples) if name.startswith("app.")
+        ],
+    }
+
+
+def time_to_ready(runs: int) -> dict:
+    """Seconds from spawning uvicorn until /health answers, with and without startup migrations."""
+    result = {}
+    for label, auto_migrate in (("auto_migrate", "1"), ("no_migrate", "0")):
+        durations = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            with running_server({"DB_AUTO_MIGRATE": auto_migrate}):
+                durations.append(time.perf_counter() - started)
+        result[label] = {
+            "median_s": round(statistics.median(durations), 3),
+            "max_s": round(max(durations), 3),
+        }
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters / servers per measurement")
+    parser.add_argument("--top", type=int, default=25, help="slowest modules to list")
+    parser.add_argument("--output", type=Path, help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    report = {"imports": import_times(args.runs, args.top), "time_to_ready": time_to_ready(args.runs)}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Check that a large upload does not stall the rest of the API.
+
+Starts uvicorn against a throwaway database, posts a large timesheet CSV and,
+while it is loading, polls ``/health``. Prints the probe latency percentiles
+measured during the upload as JSON and exits with status 1 when the p95 is
+above ``--max-p95-ms`` (or a probe fails), i.e. when the upload blocks the
+event loop again.
+
+    cd backend && python -m benchmarks.upload_concurrency --rows 500000
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+
+import httpx
+
+from benchmarks.common import BACKEND_DIR, latency_summary, percentile, running_server
+
+
+def _timesheets_csv(rows: int) -> bytes:
+    lines = ["id,employee_id,project_id,hours_worked"]
+    lines.extend(f"{i},{1 + i % 2},{1 + i % 3 % 2},{i % 9}" for i in range(1, rows + 1))
+    return ("\n".join(lines) + "\n").encode()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--probe", default="/health")
+    parser.add_argument(
+        "--max-p95-ms", type=float, default=250.0, help="fail when the probe's p95 latency during the upload is higher"
+    )
+    args = parser.parse_args()
+
+    with running_server() as server, httpx.Client(base_url=server.base_url, timeout=600) as client:
+        for data_type in ("employees", "projects"):
+            csv = (BACKEND_DIR / f"{data_type}.csv").read_bytes()
+            client.post(f"/upload/{data_type}", files={"file": (f"{data_type}.csv", csv)})
+
+        payload = _timesheets_csv(args.rows)
+        result = {}
+
+        def upload():
+            started = time.perf_counter()
+            response = client.post("/upload/timesheets", files={"file": ("timesheets.csv", payload)})
+            result["upload_seconds"] = round(time.perf_counter() - started, 3)
+            result["upload"] = response.json()
+
+        thread = threading.Thread(target=upload)
+        thread.start()
+        latencies = []
+        probe_errors = 0
+        with httpx.Client(base_url=server.base_url, timeout=600) as probe:
+            while thread.is_alive():
+                started = time.perf_counter()
+                if probe.get(args.probe).status_code != 200:
+                    probe_errors += 1
+                latencies.append((time.perf_counter() - started) * 1000)
+                time.sleep(0.01)
+        thread.join()
+
+    p95 = round(percentile(latencies, 95), 2) if latencies else None
+    failures = []
+    if not latencies:
+        failures.append("the upload finished before the first probe; use more --rows")
+    elif p95 > args.max_p95_ms:
+        failures.append(f"{args.probe} p95 {p95} ms during the upload is over {args.max_p95_ms} ms")
+    if probe_errors:
+        failures.append(f"{probe_errors} probe request(s) did not return 200")
+    print(json.dumps({
+        "rows": args.rows,
+        "upload_seconds": result["upload_seconds"],
+        "rows_per_second": result["upload"].get("rows_per_second"),
+        "probe": args.probe,
+        **{f"probe_{key}": value for key, value in latency_summary(latencies).items()},
+        "probe_p95_ms": p95,
+        "max_p95_ms": args.max_p95_ms,
+        "passed": not failures,
+        "failures": failures,
+    }, indent=2))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""timesheets.work_date and the period index
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+Databases created before migrations existed were built with create_all, so
+this revision checks what is already there instead of assuming a schema.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+INDEX = "ix_timesheets_work_date_project_employee"
+
+
+def _inspect():
+    return sa.inspect(op.get_bind())
+
+
+def upgrade() -> None:
+    inspector = _inspect()
+    if "timesheets" not in inspector.get_table_names():
+        return  # fresh database; create_all builds the current schema
+    if "work_date" not in {column["name"] for column in inspector.get_columns("timesheets")}:
+        op.add_column("timesheets", sa.Column("work_date", sa.Date(), nullable=True))
+    if INDEX not in {index["name"] for index in inspector.get_indexes("timesheets")}:
+        op.create_index(INDEX, "timesheets", ["work_date", "project_id", "employee_id"])
+
+
+def downgrade() -> None:
+    op.drop_index(INDEX, table_name="timesheets")
+    with op.batch_alter_table("timesheets") as batch:
+        batch.drop_column("work_date")
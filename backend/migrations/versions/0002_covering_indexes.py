@@ -0,0 +1,42 @@
+"""covering indexes for the analytics queries
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "ix_timesheets_employee_project_hours": ("timesheets", ["employee_id", "project_id", "hours_worked"]),
+    "ix_timesheets_project_employee_hours": ("timesheets", ["project_id", "employee_id", "hours_worked"]),
+    "ix_timesheets_period_covering": ("timesheets", ["work_date", "project_id", "employee_id", "hours_worked"]),
+    "ix_employees_department_rate": ("employees", ["department", "id", "hourly_rate"]),
+}
+# superseded by ix_timesheets_period_covering
+OLD_PERIOD_INDEX = "ix_timesheets_work_date_project_employee"
+
+
+def _indexes(inspector, table):
+    return {index["name"] for index in inspector.get_indexes(table)}
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    for name, (table, columns) in INDEXES.items():
+        if table in tables and name not in _indexes(inspector, table):
+            op.create_index(name, table, columns)
+    if "timesheets" in tables and OLD_PERIOD_INDEX in _indexes(inspector, "timesheets"):
+        op.drop_index(OLD_PERIOD_INDEX, table_name="timesheets")
+
+
+def downgrade() -> None:
+    op.create_index(OLD_PERIOD_INDEX, "timesheets", ["work_date", "project_id", "employee_id"])
+    for name, (table, _) in INDEXES.items():
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,33 @@
+"""upload_fingerprints for skipping unchanged uploads
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+TABLE = "upload_fingerprints"
+
+
+def upgrade() -> None:
+    if TABLE in sa.inspect(op.get_bind()).get_table_names():
+        return  # created by create_all
+    op.create_table(
+        TABLE,
+        sa.Column("data_type", sa.String(), primary_key=True),
+        sa.Column("file_hash", sa.String(), nullable=False),
+        sa.Column("table_version", sa.Integer(), nullable=False),
+        sa.Column("pruned", sa.Boolean(), nullable=False),
+        sa.Column("rows", sa.Integer(), nullable=False),
+        sa.Column("uploaded_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table(TABLE)
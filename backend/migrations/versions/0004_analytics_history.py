@@ -0,0 +1,47 @@
+"""analytics_history snapshots for trend queries
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+SNAPSHOTS = "analytics_history"
+ROWS = "analytics_history_rows"
+
+
+def upgrade() -> None:
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    if SNAPSHOTS not in tables:
+        op.create_table(
+            SNAPSHOTS,
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("taken_at", sa.DateTime(), nullable=False),
+            sa.Column("data_version", sa.String(), nullable=False, unique=True),
+            sa.Column("total_hours", sa.Float(), nullable=False),
+            sa.Column("total_cost", sa.Float(), nullable=False),
+            sa.Column("total_revenue", sa.Float(), nullable=False),
+        )
+        op.create_index("ix_analytics_history_taken_at", SNAPSHOTS, ["taken_at"])
+    if ROWS not in tables:
+        op.create_table(
+            ROWS,
+            sa.Column("kind", sa.String(), primary_key=True),
+            sa.Column("key", sa.String(), primary_key=True),
+            sa.Column("snapshot_id", sa.Integer(), sa.ForeignKey(f"{SNAPSHOTS}.id"), primary_key=True),
+            sa.Column("total_hours", sa.Float(), nullable=False),
+            sa.Column("total_cost", sa.Float(), nullable=False),
+            sa.Column("total_revenue", sa.Float(), nullable=False),
+        )
+        op.create_index("ix_analytics_history_rows_snapshot", ROWS, ["snapshot_id"])
+
+
+def downgrade() -> None:
+    op.drop_table(ROWS)
+    op.drop_table(SNAPSHOTS)